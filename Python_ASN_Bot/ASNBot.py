@@ -7,9 +7,24 @@ from playwright.async_api import async_playwright
 import requests
 import pandas as pd
 
+from EtaEngine import lookup_eta, precompute_etas
+from ExcelCache import load_cached
+from QueueScraper import (
+    extract_rows, next_page, open_queue, report_page_waits, save_queue_snapshot, start_queue_snapshot,
+)
+from ResourceBlocker import disable_resource_blocking, enable_resource_blocking, report_blocked
+from RetryQueue import RetryQueue, retry_status
+from RunJournal import journal_path, load_completed, open_journal, record
+from StatusWriter import StatusWriter
+from Tracing import finish_trace, instrument_context, set_tag, start_trace, traced, traced_sleep
+
 target_site = "https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue?openid.assoc_handle=amzn_vc_us_v2&openid.claimed_id=https%3A%2F%2Fvendorcentral.amazon.com%2Fap%2Fid%2Famzn1.account.AERNEUPQAXWSM2DTBSEAINFHCFUA&openid.identity=https%3A%2F%2Fvendorcentral.amazon.com%2Fap%2Fid%2Famzn1.account.AERNEUPQAXWSM2DTBSEAINFHCFUA&openid.mode=id_res&openid.ns=http%3A%2F%2Fspecs.openid.net%2Fauth%2F2.0&openid.op_endpoint=https%3A%2F%2Fvendorcentral.amazon.com%2Fap%2Fsignin&openid.response_nonce=2025-03-14T22%3A56%3A06Z3064750971631980168&openid.return_to=https%3A%2F%2Fvendorcentral.amazon.com%2Fkt%2Fvendor%2Fmembers%2Fafi-shipment-mgr%2Fshippingqueue&openid.signed=assoc_handle%2Cclaimed_id%2Cidentity%2Cmode%2Cns%2Cop_endpoint%2Cresponse_nonce%2Creturn_to%2Cns.pape%2Cpape.auth_policies%2Cpape.auth_time%2Csigned&openid.ns.pape=http%3A%2F%2Fspecs.openid.net%2Fextensions%2Fpape%2F1.0&openid.pape.auth_policies=SinglefactorWithPossessionChallenge&openid.pape.auth_time=2025-03-14T22%3A55%3A39Z&openid.sig=c8PoFmf9ENHIP6yMONolJjf1GrheveoIWNyJJPz%2Fb68%3D&serial="
 wrhs_file = "../Warehouse_Ship_Days.xlsx"
 log_file = "./ASN_Status.xlsx"
+submission_workers = 3  # Number of tabs submitting ASNs at the same time (1 = one tab like before)
+fast_tracking_fill = True  # Set tracking numbers through the carton grid in one batch, False = click every row
+max_window_days = 31  # Longest pickup window accepted as 'MM/DD/YYYY-MM/DD/YYYY'
+submit_clicked = set()  # ASN links whose submit click was sent, a retry could submit them twice
 
 def format_date(user_input):
     """
@@ -30,34 +45,49 @@ def format_date(user_input):
     except ValueError:
         return "❌ Invalid date format. Please enter date as MM/DD/YYYY."
 
+def window_dates(user_input):
+    """
+    Turns a pickup date or an inclusive window into the list of dates it covers.
+
+    Example:
+    Input: "03/10/2025-03/12/2025"
+    Output: ["03/10/2025", "03/11/2025", "03/12/2025"]
+
+    Returns [] if a date is invalid, the window ends before it starts or is longer than max_window_days.
+    """
+    try:
+        start, _, end = user_input.strip().partition("-")
+        first = datetime.strptime(start.strip(), "%m/%d/%Y")
+        last = datetime.strptime(end.strip(), "%m/%d/%Y") if end else first
+    except ValueError:
+        return []
+    if not end:
+        return [start.strip()]  # Same key as before for the journal
+    days = (last - first).days + 1
+    if days < 1 or days > max_window_days:
+        return []
+    return [(first + timedelta(days=i)).strftime("%m/%d/%Y") for i in range(days)]
+
 def get_eta(date, eta):
     """
     Calculates the estimated arrival date given a shipping date and ETA in days,
-    skipping weekends.
+    skipping weekends and carrier holidays (see EtaEngine).
+    Dates are precomputed for the whole run, so this is normally a cache lookup.
 
     :param date: A string representing the shipping date in "MM/DD/YYYY" format.
     :param eta: An integer representing the estimated transit time in days.
     :return: A string representing the adjusted arrival date in "MM/DD/YYYY" format.
     """
     try:
-        # Convert date string to datetime object
-        ship_date = datetime.strptime(date, "%m/%d/%Y")
-        days_added = 0
-
-        while days_added < eta:
-            ship_date += timedelta(days=1)
-            if ship_date.weekday() not in [5, 6]:  # Skip weekends (Saturday=5, Sunday=6)
-                days_added += 1
-
-        # If the final arrival date lands on a weekend, push it to Monday
-        while ship_date.weekday() in [5, 6]:
-            ship_date += timedelta(days=1)
-
-        return ship_date.strftime("%m/%d/%Y")
+        return lookup_eta(date, eta)
     except ValueError:
         return "❌ Invalid date format. Please use MM/DD/YYYY."
 
-def extract_excel_data(file_path):
+def build_wrhs_table(file_path):
+    """
+    Builds the warehouse -> transit days table from the first and third columns.
+    Stops at the first empty transit-days cell and reports every bad row in one message.
+    """
     # Load the Excel file (pandas uses openpyxl automatically for .xlsx)
     df = pd.read_excel(file_path, engine="openpyxl")
 
@@ -66,25 +96,27 @@ def extract_excel_data(file_path):
         print("❌ The Excel file must have at least 3 columns.")
         return
 
-    # Extract first and third columns
-    data_dict = {}
-    for index, row in df.iterrows():
-        key = str(row.iloc[0]).strip()  # First column as string
-        value = row.iloc[2]  # Third column
+    keys = df.iloc[:, 0].astype(str).str.strip()  # First column as string
+    raw_values = df.iloc[:, 2]  # Third column
+    values = pd.to_numeric(raw_values, errors="coerce")
 
-        # Ensure value is an integer
-        try:
-            value = int(value)
-            data_dict[key] = value
-        except ValueError:
-            print(f"⚠️ Skipping row {index+1}: '{value}' is not an integer.")
+    # Stop when we hit an empty row
+    empty = raw_values.isna().to_numpy()
+    if empty.any():
+        stop = empty.argmax()
+        keys, raw_values, values = keys.iloc[:stop], raw_values.iloc[:stop], values.iloc[:stop]
 
-        # Stop when we hit an empty row
-        if pd.isna(key) or pd.isna(value):
-            break
+    # Ensure value is an integer
+    bad = values.isna()
+    if bad.any():
+        skipped = ", ".join(f"row {index + 1} ('{value}')" for index, value in raw_values[bad].items())
+        print(f"⚠️ Skipping {int(bad.sum())} row(s) that are not an integer: {skipped}")
 
+    return dict(zip(keys[~bad].tolist(), values[~bad].astype(int).tolist()))
 
-    return data_dict
+def extract_excel_data(file_path):
+    """Warehouse -> transit days, read from the binary cache unless the Excel file changed."""
+    return load_cached(file_path, "wrhs", build_wrhs_table)
 
 # Don't ask how this function works it just does
 async def connect_browser():
@@ -141,11 +173,11 @@ async def connect_browser():
 
 async def extract_pg_data(page, formatted_date_input):
     """
-    Extract all elements with class 'kat-label.kat-label-light-text'.
+    Reads every row on the page in one call (see QueueScraper.extract_rows).
+    formatted_date_input is one 'Mon D, YYYY' date or a list of them (a pickup window).
     This finds all ARN's and their links
     """
-    await page.wait_for_selector("div.rdt_TableRow", state="attached", timeout=20000)
-    table_rows = await page.query_selector_all("div.rdt_TableRow")
+    table_rows = await extract_rows(page)
 
     if not table_rows:
         print("❌ No table rows found. The page structure may have changed or elements are not loading.")
@@ -154,24 +186,21 @@ async def extract_pg_data(page, formatted_date_input):
     print(f"✅ Found {len(table_rows)} table rows.")  # Debugging print
 
     table_data = {}
+    wanted = [formatted_date_input] if isinstance(formatted_date_input, str) else formatted_date_input
 
     for row in table_rows:
-        # Extract ARN & Link
-        arn_link_element = await row.query_selector("kat-link[id^='sq-table-arn-link']")
-        arn = await arn_link_element.get_attribute("label") if arn_link_element else None
-        arn_link = await arn_link_element.get_attribute("href") if arn_link_element else None
-        arn_link = f"https://vendorcentral.amazon.com{arn_link}" if arn_link else None
+        # ARN & Link
+        arn = row["arn"]
+        arn_link = f"https://vendorcentral.amazon.com{row['href']}" if row["href"] else None
 
-        # Extract Pickup Date
-        pickup_element = await row.query_selector("kat-label[id^='sq-table-sl2'][text^='Pickup:']")
-        pickup_date = await pickup_element.get_attribute("text") if pickup_element else None
+        # Pickup Date
+        pickup_date = row["pickup"]
 
-        # Extract Ship From & Ship To Location
-        ship_from_to_elements = await row.query_selector_all("kat-label[id^='sq-table-st']")
-        ship_location = " | ".join([await loc.get_attribute("text") for loc in ship_from_to_elements]) if ship_from_to_elements else None
+        # Ship From & Ship To Location
+        ship_location = row["ship"]
 
         if arn and pickup_date:
-            if formatted_date_input in pickup_date:
+            if any(date in pickup_date for date in wanted):
                 arn_link = arn_link.replace("shipmentdetail?rr=", "asnsubmission?arn=")
                 arn_link = arn_link.replace("&asn=", "&asnId=")
                 print(f"{arn}: {arn_link}---{pickup_date}---{ship_location.split(',')[0]}")
@@ -184,12 +213,18 @@ async def extract_pg_data(page, formatted_date_input):
 
     return table_data
 
+@traced
 async def paginate_and_extract(page, formatted_date_input):
     """
     Extract ARN's using function above and click the 'Next' button until no more pages exist.
+    With a list of dates the whole pickup window is collected in the same single pass.
     """
     table_data = {}
     cancel_counter = 1 
+    page_waits = []
+    await start_queue_snapshot(
+        page, formatted_date_input if isinstance(formatted_date_input, str) else " - ".join(formatted_date_input)
+    )
 
     while True:
         try:
@@ -199,13 +234,13 @@ async def paginate_and_extract(page, formatted_date_input):
             next_button = await page.query_selector("div#sq-pag-next-div")
             if (next_button and len(new_data) > 0):
                 print("➡️ Next page found! Clicking 'Next'...")
-                await next_button.click()
-                await asyncio.sleep(3)  # Wait for the next page to load
+                if not await next_page(page, next_button, page_waits):  # Waits for the next page to load
+                    break
             elif (next_button and len(new_data) == 0 and cancel_counter != 0) :
                 cancel_counter -= 1
                 print("➡️ Next page found! Clicking 'Next'...")
-                await next_button.click()
-                await asyncio.sleep(3)  # Wait for the next page to load
+                if not await next_page(page, next_button, page_waits):  # Waits for the next page to load
+                    break
             else:
                 print("No more pages with required pickup date...\n")
                 break
@@ -213,8 +248,11 @@ async def paginate_and_extract(page, formatted_date_input):
             print("No data was found on this page...\n\n")
             break        
     
+    save_queue_snapshot(page)
+    report_page_waits(page_waits, page)
     return table_data
 
+@traced
 async def cont_to_step(page, step_num):
     await page.wait_for_selector(f"kat-button[label='Continue to step {step_num}']", timeout=20000)
     button = await page.query_selector(f"kat-button[label='Continue to step {step_num}']")
@@ -224,7 +262,102 @@ async def cont_to_step(page, step_num):
     else:
         print(f"Error: Continue to step {step_num} button not found")
 
-async def fill_tracking_numbers(page):
+# Finds the carton grid's API. Which hook exists depends on the ag-Grid build the page ships.
+GRID_API_JS = """
+    const findGridApi = () => {
+        for (const el of document.querySelectorAll('.ag-root-wrapper, .ag-root, [class*="ag-theme"]')) {
+            for (const key of Object.keys(el)) {
+                if (!key.startsWith('__agComponent')) continue;
+                const comp = el[key];
+                const api = comp && (comp.gridApi || comp.api || (comp.beans && comp.beans.gridApi)
+                    || (comp.gridOptionsWrapper && comp.gridOptionsWrapper.gridOptions.api)
+                    || (comp.gridOptionsService && comp.gridOptionsService.api));
+                if (api && api.getDisplayedRowAtIndex) return api;
+            }
+        }
+        return null;
+    };
+"""
+
+# One call: every row's carton label and tracking number, plus the tracking number options
+READ_TRACKING_GRID_JS = "async () => {" + GRID_API_JS + """
+    const api = findGridApi();
+    if (!api) return null;
+    const rows = [];
+    for (let i = 0; i < api.getDisplayedRowCount(); i++) {
+        const data = api.getDisplayedRowAtIndex(i).data || {};
+        rows.push({label: String(data.cartonLabelBarcode || ''), tracking: String(data.carrierTrackingNumber || '')});
+    }
+    const column = api.getColumn ? api.getColumn('carrierTrackingNumber')
+        : (api.columnModel || api.columnController).getPrimaryColumn('carrierTrackingNumber');
+    const params = (column && column.getColDef().cellEditorParams) || {};
+    let values = params.values;
+    if (typeof values === 'function') values = await values({colDef: column.getColDef(), column, api});
+    return {rows, options: (values || []).map(String)};
+}"""
+
+# One batch through the grid's own data API, so its change handlers run as if picked by hand
+ASSIGN_TRACKING_GRID_JS = "(assignments) => {" + GRID_API_JS + """
+    const api = findGridApi();
+    for (const [index, value] of assignments) {
+        api.getDisplayedRowAtIndex(index).setDataValue('carrierTrackingNumber', value);
+    }
+    api.refreshCells({columns: ['carrierTrackingNumber'], force: true});
+    const values = [];
+    for (let i = 0; i < api.getDisplayedRowCount(); i++) {
+        values.push(String((api.getDisplayedRowAtIndex(i).data || {}).carrierTrackingNumber || ''));
+    }
+    return values;
+}"""
+
+async def read_tracking_options(page, row_index):
+    """Opens one tracking number dropdown to read the options when the grid doesn't expose them."""
+    await page.dblclick(f"div[row-index='{row_index}'] div[col-id='carrierTrackingNumber']")
+    await page.wait_for_selector(".ag-rich-select-list", state="visible", timeout=5000)
+    options = await page.evaluate(
+        "() => Array.from(document.querySelectorAll('.ag-rich-select-row'), row => row.innerText.trim())"
+    )
+    await page.keyboard.press("Escape")
+    return options
+
+@traced
+async def fill_tracking_numbers_in_grid(page):
+    """
+    Fast path: reads the carton grid in one call, sets every AMZN row's tracking number
+    in one batch and checks the values that came back. Returns False if the grid API
+    isn't reachable or the values didn't stick, so the caller can click through instead.
+    """
+    try:
+        grid = await page.evaluate(READ_TRACKING_GRID_JS)
+        if not grid:
+            print("⚠️ Carton grid API not found, selecting tracking numbers one row at a time.")
+            return False
+        rows = grid["rows"]
+        amzn_rows = [index for index, row in enumerate(rows) if row["label"].startswith("AMZN")]
+        options = grid["options"] or (await read_tracking_options(page, amzn_rows[0]) if amzn_rows else [])
+
+        # Same pairing as the dropdown: carton row N gets the N-th tracking number
+        assignments = []
+        for index in amzn_rows:
+            if index < len(options) and options[index].strip():
+                if rows[index]["tracking"] != options[index]:
+                    assignments.append([index, options[index]])
+            else:
+                print(f"❌ Row {index + 1}: No corresponding tracking number found!")
+        print(f"✅ Found {len(rows)} rows, {len(amzn_rows)} with 'AMZN' labels. Setting {len(assignments)} tracking number(s)...")
+
+        values = await page.evaluate(ASSIGN_TRACKING_GRID_JS, assignments)
+        missed = [index + 1 for index, value in assignments if values[index] != value]
+        if missed:
+            print(f"⚠️ Tracking numbers didn't stick on rows {missed}, selecting them one row at a time.")
+            return False
+        return True
+    except Exception as e:
+        print(f"⚠️ Couldn't fill tracking numbers through the grid: {e}")
+        return False
+
+@traced
+async def fill_tracking_numbers_by_clicking(page):
     """
     Clicks the tracking number cell and selects the corresponding tracking number 
     for each row where cartonLabelBarcode starts with 'AMZN'.
@@ -275,9 +408,17 @@ async def fill_tracking_numbers(page):
         except Exception as e:
             print(f"⚠️ Skipping row {i + 1} due to error: {e}")
 
+@traced
+async def fill_tracking_numbers(page):
+    """Sets each AMZN carton's tracking number, then continues to step 4."""
+    await page.wait_for_selector("div[col-id='carrierTrackingNumber']", state="attached", timeout=20000)
+    if not (fast_tracking_fill and await fill_tracking_numbers_in_grid(page)):
+        await fill_tracking_numbers_by_clicking(page)
+
     print("✅ Finished filling tracking numbers.")
     await cont_to_step(page, "4")
 
+@traced
 async def set_ship_date(page, date):
     """
     Sets the given date (MM/DD/YYYY) inside the kat-date-picker#asnlabel-shipdate-picker element.
@@ -309,6 +450,7 @@ async def set_ship_date(page, date):
     await input_field.fill(date)
     print(f"✅ Ship Date set to: {date}")
 
+@traced
 async def set_arrival_date(page, date, eta):
     """
     Sets the given date (MM/DD/YYYY) inside the kat-date-picker#asnlabel-edd-picker element.
@@ -337,12 +479,15 @@ async def set_arrival_date(page, date, eta):
         return
 
     # Fill the input field with the date
-    await input_field.fill(get_eta(date, eta))
-    print(f"✅ EDD Date set to: {get_eta(date, eta)}")
+    arrival_date = get_eta(date, eta)
+    await input_field.fill(arrival_date)
+    print(f"✅ EDD Date set to: {arrival_date}")
 
-async def adjust_and_click_submit_button(page):
+@traced
+async def adjust_and_click_submit_button(page, link=None):
     """
     Adjusts the 'Confirm and submit shipment' button by removing the 'disabled' attribute and clicks it.
+    The link is marked as submitted right before the click so a failure after it is not retried.
     """
     # Locate the button using the label
     button_selector = 'kat-button[label="Confirm and submit shipment"]'
@@ -362,9 +507,12 @@ async def adjust_and_click_submit_button(page):
     """)
 
     # Click the button
+    if link:
+        submit_clicked.add(link)  # From here on a retry could submit the ASN twice
     await page.click(button_selector)
     print("✅ 'Confirm and submit shipment' button clicked.")
 
+@traced
 async def asn_submission(page, link, date_input, eta):
     await page.goto(link)  # Navigate to the link
     print(link)
@@ -373,63 +521,166 @@ async def asn_submission(page, link, date_input, eta):
     await fill_tracking_numbers(page)
     await set_ship_date(page, date_input)
     await set_arrival_date(page, date_input, eta)
-    await adjust_and_click_submit_button(page)
-    await asyncio.sleep(3)
+    await adjust_and_click_submit_button(page, link)
+    await traced_sleep(3)
+
+async def submit_arn(page, key, value, date_input, eta_by_wrhs, retries=None):
+    """
+    Submits one ARN ([link, pickup, warehouse]) and returns its log row [ARN, Warehouse, Link, Status].
+    With a RetryQueue, an ARN that failed on a retryable error is put back and gets the retry_status,
+    unless the submit button was already clicked for it.
+    """
+    try:
+        print(f"{key} -> {(value[2])}: {eta_by_wrhs.get(value[2])} day(s)")
+        await asn_submission(page, value[0], date_input, eta_by_wrhs.get(value[2]))
+        submission_status = "Submitted"
+        print("\n")
+    except TypeError as wrhsE:
+        print(f"❌Error with warehouse {value[2]}... {wrhsE}\n\n")
+        submission_status = "Warehouse Not Found"
+        if retries:
+            retries.schedule(key, value, wrhsE)  # Never retried, only counted
+    except Exception as e:
+        print(f"❌Error with ARN {key}... {e}\n\n")
+        if value[0] in submit_clicked or not (retries and retries.schedule(key, value, e)):
+            submission_status = "Error"
+        else:
+            submission_status = retry_status
+    return [key, value[2], value[0], submission_status]
 
-async def run_script():
-    log_data = []
+async def submission_worker(worker_page, queue, results, eta_by_wrhs, journal, writer, retries):
+    """
+    Pulls ARNs off the shared queue and submits each one on this worker's own tab.
+    Results are stored by the ARN's position so the log keeps the extraction order,
+    and journaled under the ARN's pickup date and streamed to the status log right away
+    so a crash doesn't lose them. ARNs put back for a retry are logged when they're retried.
+    """
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+
+        position, key, value, date_input = item
+        set_tag(key)
+        results[position] = await submit_arn(worker_page, key, value, date_input, eta_by_wrhs, retries)
+        if results[position][-1] == retry_status:
+            continue
+        record(journal, date_input, key, [results[position]])
+        writer.write(results[position])
+
+async def submit_all(page, arn_data, arn_dates, eta_by_wrhs, journal, writer, retries=None):
+    """
+    Runs asn_submission for every ARN using a pool of tabs in the same browser context.
+    arn_dates maps each ARN to its pickup date (MM/DD/YYYY), so one pool covers a whole window.
+    The first worker reuses the connected page, the others get a new tab each.
+    """
+    worker_count = max(1, min(submission_workers, len(arn_data)))
+    worker_pages = [page]
+    for _ in range(worker_count - 1):
+        worker_pages.append(await page.context.new_page())
+    print(f"🧵 Submitting {len(arn_data)} ARNs with {worker_count} tab(s)")
+
+    queue = asyncio.Queue()
+    for position, (key, value) in enumerate(arn_data.items()):
+        queue.put_nowait((position, key, value, arn_dates[key]))
+    for _ in worker_pages:
+        queue.put_nowait(None)  # One stop signal per worker
+
+    results = [None] * len(arn_data)
+    try:
+        await asyncio.gather(*[
+            submission_worker(worker_page, queue, results, eta_by_wrhs, journal, writer, retries)
+            for worker_page in worker_pages
+        ])
+    finally:
+        for worker_page in worker_pages[1:]:
+            await worker_page.close()
+
+    return results
+
+async def run_script(page=None, date_input=None):
     """Get Warehouse ship days"""
     eta_by_wrhs = extract_excel_data(wrhs_file)
 
-    """Runs the script and ensures proper cleanup."""
+    """
+    Runs the script and ensures proper cleanup.
+    When SessionDaemon passes in a page the browser connection is left open afterwards.
+    """
     warnings.filterwarnings("ignore", category=ResourceWarning)  # Suppress asyncio resource warnings
 
-    playwright, browser, page = await connect_browser()
+    if page:
+        playwright, browser = None, None  # Owned by SessionDaemon
+    else:
+        playwright, browser, page = await connect_browser()
     if not page:
         print("❌ No valid page found. Exiting.")
         return
 
     print("✅ Playwright is running. Press CTRL+C to stop.")
+    await enable_resource_blocking(page.context)  # Context wide so worker tabs are covered too
+    start_trace()
+    instrument_context(page.context)
+    submit_clicked.clear()  # SessionDaemon keeps the module loaded between runs
     
+    journal = open_journal(log_file)
+    writer = StatusWriter(log_file, ["ARN", "Warehouse", "Link", "Status"])
     try:
         #######################################################################################
         ############################### ALL MAIN CODE RAN BELOW ###############################
         #######################################################################################
-        # Navigate to below page before anything:
-        await page.goto("https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue")
-        await asyncio.sleep(2)
-
-        """Get Pickup Date"""
-        date_input = input("Enter a date (MM/DD/YYYY): ")
-        formatted_date_input = format_date(date_input)
+        """Get Pickup Date (or a window, e.g. 03/10/2025-03/14/2025)"""
+        if not date_input:
+            date_input = input("Enter a date (MM/DD/YYYY) or a date range (MM/DD/YYYY-MM/DD/YYYY): ")
+        dates = window_dates(date_input)
+        if not dates:
+            print(f"❌ Invalid date or date range. Use MM/DD/YYYY or MM/DD/YYYY-MM/DD/YYYY (up to {max_window_days} days).")
+            return
+        formatted_dates = {format_date(date): date for date in dates}
+
+        # Navigate to the shipping queue, filtered to the pickup dates where the queue allows it
+        await open_queue(page, dates)
         
         """Find All Products and Store in a Dictionary"""        
+        formatted_date_input = list(formatted_dates) if len(dates) > 1 else next(iter(formatted_dates))
         arn_data = await paginate_and_extract(page, formatted_date_input)
         print(f"\n🔎 Extracted {len(arn_data)} ARNs: {arn_data}\n")
 
+        """Bucket ARNs By Pickup Date"""
+        arn_dates = {}
+        for key, value in arn_data.items():
+            arn_dates[key] = next(date for formatted, date in formatted_dates.items() if formatted in value[1])
+        if len(dates) > 1:
+            for formatted, date in formatted_dates.items():
+                print(f"📅 {formatted}: {sum(1 for arn_date in arn_dates.values() if arn_date == date)} ARN(s)")
+
+        """Skip ARNs A Previous Run Already Submitted"""
+        completed = {}
+        for date in dates:
+            completed.update({
+                key: rows for key, rows in load_completed(log_file, date).items() if arn_dates.get(key) == date
+            })
+        pending = {key: value for key, value in arn_data.items() if key not in completed}
+        if len(pending) < len(arn_data):
+            print(f"⏭️ Skipping {len(arn_data) - len(pending)} ARN(s) already submitted (see {journal_path(log_file)})")
+            for key in arn_data.keys() - pending.keys():
+                for row in completed[key]:
+                    writer.write(row)
+
+        """Work Out Every Arrival Date In One Batch"""
+        precompute_etas([(arn_dates[key], eta_by_wrhs.get(value[2])) for key, value in pending.items()])
+
         """Visit Each ASN Submission Page"""
-        submission_status = "Error"  # Default status in case of failure
         print("\n\n**************************************************\n**************************************************\n**************************************************\n*************Now Beginning Submissions************\n**************************************************\n**************************************************\n**************************************************\n")
-        for key, value in arn_data.items():
-            try:
-                print(f"{(value[2])}: {eta_by_wrhs.get(value[2])} day(s)")
-                await asn_submission(page, value[0], date_input, eta_by_wrhs.get(value[2]))
-                submission_status = "Submitted"
-                print("\n")
-            except TypeError as wrhsE:
-                print(f"❌Error with warehouse {value[2]}... {wrhsE}\n\n")
-                submission_status = "Warehouse Not Found"
-            except Exception as e:
-                print(f"❌Error with ARN {key}... {e}\n\n")
-                submission_status = "Error"
-
-            log_data.append([key, value[2], value[0], submission_status])
-            
-        df = pd.DataFrame(log_data, columns=["ARN", "Warehouse", "Link", "Status"])
-
-        # Save DataFrame to Excel
-        df.to_excel(log_file, index=False, engine="openpyxl")
-        print(f"✅ Log saved to {log_file}")
+        retries = RetryQueue("ASN submission(s)")
+        batch = pending
+        while batch:
+            await submit_all(page, batch, arn_dates, eta_by_wrhs, journal, writer, retries)
+            batch = await retries.due()  # Timed out ARNs, once their backoff is over
+        retries.report()
+
+        # Save the streamed rows to Excel in extraction order
+        await writer.close(arn_data.keys())
+        report_blocked()
 
         #######################################################################################
         ############################### ALL MAIN CODE RAN ABOVE ###############################
@@ -439,6 +690,10 @@ async def run_script():
     except KeyboardInterrupt:
         print("\n🛑 Shutting down gracefully...")
     finally:
+        writer.stop()
+        journal.close()
+        finish_trace("ASNBot")
+        await disable_resource_blocking(page.context)
         if browser:
             await browser.close()
         if playwright:
@@ -0,0 +1,204 @@
+"""
+End-to-end benchmark of the four bots against MockVendorCentral.
+
+Launches its own Chromium, sends every vendorcentral.amazon.com request to the mock server
+and runs each bot's run_script with that page, on generated input files in a temp folder.
+Prints ARNs/min (invoices/min for InvoiceSubmissionBot) and p50/p95 for each step.
+
+    python ./BenchmarkBots.py                  (all four bots)
+    python ./BenchmarkBots.py ASNBot PrintLabels
+"""
+import asyncio
+import functools
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+from playwright.async_api import async_playwright
+
+import ASNBot
+import InvoiceSubmissionBot
+import MockVendorCentral
+import PrepareLabels
+import PrintLabels
+import QueueScraper
+import RunJournal
+
+live_site = "https://vendorcentral.amazon.com"
+benchmark_date = "03/10/2025"
+headless = True
+
+bots = {
+    "ASNBot": ASNBot,
+    "PrepareLabels": PrepareLabels,
+    "PrintLabels": PrintLabels,
+    "InvoiceSubmissionBot": InvoiceSubmissionBot,
+}
+# Functions timed in each bot, one row each in the step table
+timed_steps = {
+    "ASNBot": ("paginate_and_extract", "asn_submission", "cont_to_step", "fill_tracking_numbers",
+               "set_ship_date", "set_arrival_date", "adjust_and_click_submit_button"),
+    "PrepareLabels": ("paginate_and_extract", "cont_to_step", "extract_pack_info", "fill_carton_inputs"),
+    "PrintLabels": ("paginate_and_extract", "click_print_sequence"),
+    "InvoiceSubmissionBot": ("search_pos", "index_results", "create_invoice", "open_search_page"),
+}
+# Log status that means the ARN / invoice went through
+done_status = {"ASNBot": "Submitted", "PrepareLabels": "Complete", "PrintLabels": "Printed", "InvoiceSubmissionBot": "Submitted"}
+# Mock server event for the same thing, to check the bots' logs against what the site saw
+done_event = {"ASNBot": "asn", "PrepareLabels": "labels", "PrintLabels": "print", "InvoiceSubmissionBot": "invoice"}
+
+
+def write_fixtures(folder):
+    """Writes the Excel files the bots read, matching the mock server's shipments and invoices."""
+    shipments = MockVendorCentral.fixtures["shipments"]
+    wrhs_file = os.path.join(folder, "Warehouse_Ship_Days.xlsx")
+    pd.DataFrame({
+        "Warehouse": list(MockVendorCentral.warehouses),
+        "Location": list(MockVendorCentral.warehouses.values()),
+        "Days": [i % 4 + 1 for i in range(len(MockVendorCentral.warehouses))],
+    }).to_excel(wrhs_file, index=False)
+
+    # shipment_details.xlsx: 7 title rows, then Wrhs in A, ASIN in C, PO in D, master pack in M
+    shipment_file = os.path.join(folder, "shipment_details.xlsx")
+    rows = [[f"Shipment details ({benchmark_date})"] + [None] * 12] * 7
+    for shipment in shipments:
+        for sku in shipment["skus"]:
+            rows.append([f"{shipment['warehouse']} FC", sku["model"], sku["asin"], sku["po"]] + [None] * 8 + [sku["master"]])
+    pd.DataFrame(rows).to_excel(shipment_file, index=False, header=False)
+
+    input_file = os.path.join(folder, "invoices.xlsx")
+    pd.DataFrame({
+        "PO Number": [invoice["po"] for invoice in MockVendorCentral.fixtures["invoices"]],
+        "Invoice Date": [pd.Timestamp(invoice["shipped"]) for invoice in MockVendorCentral.fixtures["invoices"]],
+        "Invoice Number": [invoice["number"] for invoice in MockVendorCentral.fixtures["invoices"]],
+        "Amount": [invoice["amount"] for invoice in MockVendorCentral.fixtures["invoices"]],
+    }).to_excel(input_file, index=False)
+
+    return {
+        "ASNBot": {"wrhs_file": wrhs_file, "log_file": os.path.join(folder, "ASN_Status.xlsx")},
+        "PrepareLabels": {"shipment_file": shipment_file, "log_file": os.path.join(folder, "Label_Prep_Status.xlsx")},
+        "PrintLabels": {"log_file": os.path.join(folder, "PrintLabel_Log.xlsx")},
+        "InvoiceSubmissionBot": {"input_file": input_file, "output_file": os.path.join(folder, "invoices_status.xlsx")},
+    }
+
+
+def time_step(bot, name, func, step_times):
+    @functools.wraps(func)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            step_times.setdefault((bot, name), []).append(time.perf_counter() - start)
+    return timed
+
+
+async def route_to_mock(context, mock_base):
+    """Answers every live site request from the mock server. The page keeps the live URL."""
+    async def forward(route):
+        response = await route.fetch(url=route.request.url.replace(live_site, mock_base, 1))
+        await route.fulfill(response=response)
+    await context.route(f"{live_site}/**", forward)
+
+
+def count_done(bot, log_file):
+    """(rows in the bot's log, distinct ARNs / invoices that went through)"""
+    if not os.path.exists(log_file):
+        return 0, 0
+    log = pd.read_excel(log_file)
+    done = log[log.iloc[:, -1] == done_status[bot]]
+    return len(log), done.iloc[:, 0].nunique() if bot != "InvoiceSubmissionBot" else len(done)
+
+
+async def run_bot(context, name, settings, step_times):
+    """Runs one bot on a new tab with its inputs pointed at the fixtures. Returns (rows, done, seconds)."""
+    module = bots[name]
+    originals = {key: getattr(module, key) for key in settings}
+    originals.update({step: getattr(module, step) for step in timed_steps[name]})
+    for key, value in settings.items():
+        setattr(module, key, value)
+    for step in timed_steps[name]:
+        setattr(module, step, time_step(name, step, getattr(module, step), step_times))
+
+    page = await context.new_page()
+    start = time.perf_counter()
+    try:
+        if name == "InvoiceSubmissionBot":
+            await module.run_script(page=page)
+        else:
+            await module.run_script(page=page, date_input=benchmark_date)
+    finally:
+        seconds = time.perf_counter() - start
+        for key, value in originals.items():
+            setattr(module, key, value)
+        await page.close()
+
+    log_file = settings.get("log_file") or settings.get("output_file")
+    return (*count_done(name, log_file), seconds)
+
+
+def percentile(times, q):
+    times = sorted(times)
+    return times[int(q * (len(times) - 1))]
+
+
+def report(results, step_times):
+    print(
+        f"\n📊 Against MockVendorCentral ({MockVendorCentral.response_latency}s per response, "
+        f"{MockVendorCentral.action_latency}s per action)"
+    )
+    print(f"{'Bot':<22}{'Log rows':>9}{'Done':>6}{'Site saw':>10}{'Wall (s)':>10}{'Per min':>10}")
+    for name, (rows, done, seconds) in results.items():
+        unit = "invoices" if name == "InvoiceSubmissionBot" else "ARNs"
+        seen = len(set(MockVendorCentral.events.get(done_event[name], [])))
+        print(f"{name:<22}{rows:>9}{done:>6}{seen:>10}{seconds:>10.1f}{done / seconds * 60:>10.1f} {unit}/min")
+
+    print("\n⏱️ Step latency (s)")
+    print(f"{'Bot':<22}{'Step':<32}{'Count':>6}{'p50':>8}{'p95':>8}{'Max':>8}")
+    for (name, step), times in step_times.items():
+        print(f"{name:<22}{step:<32}{len(times):>6}{percentile(times, 0.50):>8.2f}{percentile(times, 0.95):>8.2f}{max(times):>8.2f}")
+
+
+async def run_script(selected=None):
+    warnings.filterwarnings("ignore", category=ResourceWarning)
+    selected = selected or list(bots)
+    unknown = [name for name in selected if name not in bots]
+    if unknown:
+        print(f"❌ Unknown bot(s) {', '.join(unknown)}. Use any of: {', '.join(bots)}")
+        return
+
+    server = MockVendorCentral.start_server(benchmark_date)
+    mock_base = f"http://{MockVendorCentral.mock_host}:{server.server_port}"
+    resume = RunJournal.resume_from_journal
+    snapshots = QueueScraper.use_queue_snapshots
+    RunJournal.resume_from_journal = False  # Every run does the full workload
+    QueueScraper.use_queue_snapshots = False  # and walks the queue itself
+    playwright = await async_playwright().start()
+    browser = None
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            settings = write_fixtures(folder)
+            browser = await playwright.chromium.launch(headless=headless)
+            context = await browser.new_context()
+            await route_to_mock(context, mock_base)
+
+            results = {}
+            step_times = {}
+            for name in selected:
+                print(f"\n▶️ {name}")
+                results[name] = await run_bot(context, name, settings[name], step_times)
+            report(results, step_times)
+    finally:
+        RunJournal.resume_from_journal = resume
+        QueueScraper.use_queue_snapshots = snapshots
+        if browser:
+            await browser.close()
+        await playwright.stop()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_script(sys.argv[1:]))
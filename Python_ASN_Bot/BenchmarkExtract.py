@@ -0,0 +1,114 @@
+import asyncio
+import statistics
+import time
+import warnings
+
+from ASNBot import connect_browser
+from QueueScraper import extract_rows
+
+queue_site = "https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue"
+runs = 5  # How many times each path reads the same page
+
+
+class RoundTripCounter:
+    """
+    Wraps a Playwright page or element handle and counts every awaited call made through it.
+    Element handles returned by a call are wrapped too, so row.query_selector(...) is counted.
+    """
+
+    def __init__(self, target, counts):
+        self._target = target
+        self._counts = counts
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def counted(*args, **kwargs):
+            self._counts["round_trips"] += 1
+            result = await attr(*args, **kwargs)
+            if isinstance(result, list):
+                return [RoundTripCounter(item, self._counts) for item in result]
+            if result is not None and hasattr(result, "get_attribute"):
+                return RoundTripCounter(result, self._counts)
+            return result
+
+        return counted
+
+
+async def legacy_extract_rows(page):
+    """The per-element path every bot used before QueueScraper.extract_rows."""
+    await page.wait_for_selector("div.rdt_TableRow", state="attached", timeout=20000)
+    table_rows = await page.query_selector_all("div.rdt_TableRow")
+
+    rows = []
+    for row in table_rows:
+        arn_link_element = await row.query_selector("kat-link[id^='sq-table-arn-link']")
+        arn = await arn_link_element.get_attribute("label") if arn_link_element else None
+        href = await arn_link_element.get_attribute("href") if arn_link_element else None
+
+        pickup_element = await row.query_selector("kat-label[id^='sq-table-sl2'][text^='Pickup:']")
+        pickup = await pickup_element.get_attribute("text") if pickup_element else None
+
+        sl2_element = await row.query_selector("kat-label[id^='sq-table-sl2']")
+        sl2 = await sl2_element.get_attribute("text") if sl2_element else None
+
+        date_element = await row.query_selector("kat-label[id^='sq-table-date-']")
+        date = await date_element.get_attribute("text") if date_element else None
+
+        ship_from_to_elements = await row.query_selector_all("kat-label[id^='sq-table-st']")
+        ship = " | ".join([await loc.get_attribute("text") for loc in ship_from_to_elements]) if ship_from_to_elements else None
+
+        rows.append({"arn": arn, "href": href, "pickup": pickup, "sl2": sl2, "date": date, "ship": ship})
+    return rows
+
+
+async def measure(page, extractor):
+    """Runs an extractor `runs` times and returns (rows, round trips per run, wall times)."""
+    times = []
+    counts = {"round_trips": 0}
+    rows = []
+    for _ in range(runs):
+        counts["round_trips"] = 0
+        start = time.perf_counter()
+        rows = await extractor(RoundTripCounter(page, counts))
+        times.append(time.perf_counter() - start)
+    return rows, counts["round_trips"], times
+
+
+async def run_benchmark(page):
+    legacy_rows, legacy_trips, legacy_times = await measure(page, legacy_extract_rows)
+    fast_rows, fast_trips, fast_times = await measure(page, extract_rows)
+
+    if legacy_rows != fast_rows:
+        print("⚠️ The two paths returned different rows!")
+
+    print(f"\n📊 {len(fast_rows)} rows on the page, {runs} run(s) each")
+    print(f"{'Path':<14}{'Round trips':>12}{'Median (s)':>12}{'Mean (s)':>12}")
+    for name, trips, times in [("per-element", legacy_trips, legacy_times), ("one evaluate", fast_trips, fast_times)]:
+        print(f"{name:<14}{trips:>12}{statistics.median(times):>12.3f}{statistics.mean(times):>12.3f}")
+    if statistics.median(fast_times) > 0:
+        print(f"\n⚡ Speedup: {statistics.median(legacy_times) / statistics.median(fast_times):.1f}x")
+
+
+async def run_script():
+    warnings.filterwarnings("ignore", category=ResourceWarning)
+    playwright, browser, page = await connect_browser()
+    if not page:
+        print("❌ No valid page found. Exiting.")
+        return
+
+    try:
+        await page.goto(queue_site)
+        await run_benchmark(page)
+    finally:
+        if browser:
+            await browser.close()
+        if playwright:
+            await playwright.stop()
+        print("✅ Playwright closed successfully.")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_script())
@@ -0,0 +1,80 @@
+"""
+Arrival date (EDD) calculations for ASNBot.
+
+Dates are worked out with NumPy's business-day functions for a whole batch of
+(ship date, transit days) pairs at once and memoized, so the submission loop only does lookups.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+holiday_file = "../Carrier_Holidays.xlsx"  # Optional, first column lists dates carriers don't deliver
+
+_eta_cache = {}  # (ship date "MM/DD/YYYY", transit days) -> arrival date "MM/DD/YYYY"
+_calendar = None
+
+
+def load_holidays(file_path=holiday_file):
+    """Reads the carrier holiday calendar. A missing file means weekends only."""
+    try:
+        df = pd.read_excel(file_path, engine="openpyxl", header=None)
+    except FileNotFoundError:
+        return np.array([], dtype="datetime64[D]")
+
+    dates = pd.to_datetime(df.iloc[:, 0], errors="coerce").dropna()  # Header/blank cells become NaT
+    print(f"📅 Loaded {len(dates)} carrier holiday(s) from {file_path}")
+    return dates.values.astype("datetime64[D]")
+
+
+def get_calendar():
+    """Mon-Fri business-day calendar with the carrier holidays removed, built once."""
+    global _calendar
+    if _calendar is None:
+        _calendar = np.busdaycalendar(weekmask="1111100", holidays=load_holidays())
+    return _calendar
+
+
+def precompute_etas(pairs):
+    """
+    Computes the arrival date for every (ship date, transit days) pair in one vectorized call
+    and stores them in the cache. Pairs with no transit days (unknown warehouse) are skipped.
+
+    Same rules as the old day-by-day loop: count `days` business days after the ship date,
+    and a 0-day transit that lands on a day off moves to the next business day.
+    """
+    missing = {
+        (ship_date, int(days))
+        for ship_date, days in pairs
+        if days is not None and (ship_date, int(days)) not in _eta_cache
+    }
+    if not missing:
+        return
+
+    missing = sorted(missing)
+    try:
+        ship_dates = np.array(
+            [datetime.strptime(ship_date, "%m/%d/%Y").date() for ship_date, _ in missing],
+            dtype="datetime64[D]",
+        )
+    except ValueError:
+        return  # get_eta reports the bad date
+    days = np.array([d for _, d in missing])
+
+    calendar = get_calendar()
+    counted = np.busday_offset(ship_dates, np.maximum(days, 0), roll="backward", busdaycal=calendar)
+    same_day = np.busday_offset(ship_dates, 0, roll="forward", busdaycal=calendar)
+    arrivals = np.where(days > 0, counted, same_day)
+
+    for key, arrival in zip(missing, pd.to_datetime(arrivals).strftime("%m/%d/%Y")):
+        _eta_cache[key] = arrival
+
+
+def lookup_eta(ship_date, days):
+    """Returns the cached arrival date, computing it on a miss. Raises TypeError when days is None."""
+    key = (ship_date, int(days))
+    if key not in _eta_cache:
+        precompute_etas([key])
+    if key not in _eta_cache:
+        raise ValueError(f"Invalid ship date: {ship_date}")
+    return _eta_cache[key]
@@ -0,0 +1,112 @@
+"""
+Failure-only screenshots for PrepareLabels.
+
+While an ARN is worked on, its tab is captured as a small viewport JPEG every
+`evidence_interval` seconds (plus named snapshots such as "before confirm") into a ring
+buffer that only keeps the last `evidence_frames`. Nothing is written while ARNs go
+through. When one fails, its frames are added to a single zip for the run
+(evidence/<bot>_<date>_<time>.zip) with an index.json keyed by ARN.
+"""
+import asyncio
+import collections
+import json
+import os
+import time
+import zipfile
+from datetime import datetime
+
+capture_evidence = True  # Set to False to take no screenshots at all
+evidence_folder = "./evidence"
+evidence_frames = 6  # Frames kept per tab, oldest dropped first
+evidence_interval = 2  # Seconds between background captures
+evidence_quality = 40  # JPEG quality (0-100)
+
+_buffers = {}  # page -> deque of frames for the ARN the tab is on
+_tasks = {}  # page -> background capture task
+_run = {"bot": "evidence", "path": None, "index": {}}
+_write_lock = None  # One zip write at a time, several prepare tabs can fail together
+
+
+def start_evidence(bot):
+    """Starts a new archive for this run (SessionDaemon keeps the module loaded between runs)."""
+    global _write_lock
+    _run.update(bot=bot, path=None, index={})
+    _write_lock = asyncio.Lock()
+
+
+async def _capture(page, label):
+    try:
+        image = await page.screenshot(type="jpeg", quality=evidence_quality, timeout=5000)
+    except Exception:
+        return  # Page navigating or closed, the next frame will do
+    _buffers[page].append({"time": time.time(), "label": label, "url": page.url, "image": image})
+
+
+async def _capture_loop(page):
+    while not page.is_closed():
+        await _capture(page, "background")
+        await asyncio.sleep(evidence_interval)
+
+
+def watch_page(page, key):
+    """Empties the tab's ring buffer for a new ARN and keeps capturing it in the background."""
+    if not capture_evidence:
+        return
+    _buffers[page] = collections.deque(maxlen=evidence_frames)
+    if page not in _tasks or _tasks[page].done():
+        _tasks[page] = asyncio.create_task(_capture_loop(page))
+
+
+async def snapshot(page, label):
+    """Adds one frame now, e.g. right before a confirm click. One viewport JPEG, no file written."""
+    if capture_evidence and page in _buffers:
+        await _capture(page, label)
+
+
+def _write_frames(key, status, frames):
+    if not _run["path"]:
+        os.makedirs(evidence_folder, exist_ok=True)
+        _run["path"] = os.path.join(evidence_folder, f"{_run['bot']}_{datetime.now():%Y%m%d_%H%M%S}.zip")
+    attempt = len(_run["index"].get(key, [])) + 1
+    entry = {"status": status, "time": datetime.now().isoformat(timespec="seconds"), "frames": []}
+    # JPEGs don't compress any further, so they are stored as is
+    with zipfile.ZipFile(_run["path"], "a", compression=zipfile.ZIP_STORED) as archive:
+        for number, frame in enumerate(frames, start=1):
+            name = f"{key}/attempt{attempt}_{number:02d}_{frame['label'].replace(' ', '_')}.jpg"
+            archive.writestr(name, frame["image"])
+            entry["frames"].append({
+                "file": name,
+                "label": frame["label"],
+                "url": frame["url"],
+                "time": datetime.fromtimestamp(frame["time"]).isoformat(timespec="seconds"),
+            })
+    _run["index"].setdefault(key, []).append(entry)
+
+
+async def keep_evidence(page, key, status, failed):
+    """Writes the tab's frames for `key` to the run's zip when it failed, then empties the buffer."""
+    global _write_lock
+    frames = list(_buffers.get(page, ()))
+    if page in _buffers:
+        _buffers[page].clear()
+    if not (capture_evidence and failed and frames):
+        return
+    if _write_lock is None:
+        _write_lock = asyncio.Lock()
+    async with _write_lock:
+        await asyncio.to_thread(_write_frames, key, status, frames)
+
+
+async def finish_evidence():
+    """Stops background capture and adds index.json (ARN -> attempts -> frames) to the run's zip."""
+    for task in _tasks.values():
+        task.cancel()
+    await asyncio.gather(*_tasks.values(), return_exceptions=True)
+    _tasks.clear()
+    _buffers.clear()
+    if not _run["path"]:
+        return
+    async with _write_lock:
+        with zipfile.ZipFile(_run["path"], "a", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("index.json", json.dumps(_run["index"], indent=2))
+    print(f"📸 Screenshots of {len(_run['index'])} failed ARN(s) saved to {_run['path']}")
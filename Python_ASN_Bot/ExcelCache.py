@@ -0,0 +1,79 @@
+"""
+Binary cache for tables built from Excel files.
+
+Reading .xlsx through openpyxl is the slowest part of starting a bot, and the input
+files rarely change between runs. The built table is pickled next to the Excel file
+and reused while the file's modified time (or, if only the mtime changed, its contents) match.
+"""
+import hashlib
+import os
+import pickle
+
+cache_version = 1  # Bump when a builder's output changes shape
+
+
+def cache_path(file_path, name):
+    """e.g. ../Warehouse_Ship_Days.xlsx + 'wrhs' -> ../.Warehouse_Ship_Days.wrhs.cache.pkl"""
+    folder, base = os.path.split(file_path)
+    return os.path.join(folder, f".{os.path.splitext(base)[0]}.{name}.cache.pkl")
+
+
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache(cache_file):
+    try:
+        with open(cache_file, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != cache_version:
+        return None
+    return cached
+
+
+def _write_cache(cache_file, cached):
+    """Writes to a temp file first so a crash never leaves a half-written cache."""
+    temp_file = f"{cache_file}.tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        print(f"⚠️ Could not write cache {cache_file}: {e}")
+
+
+def load_cached(file_path, name, builder):
+    """
+    Returns builder(file_path), reusing the cached result while the Excel file is unchanged.
+    Nothing is cached when the builder returns None.
+    """
+    cache_file = cache_path(file_path, name)
+    mtime = os.path.getmtime(file_path)
+    cached = _read_cache(cache_file)
+
+    digest = None
+    if cached:
+        if cached["mtime"] == mtime:
+            return cached["data"]
+        # Touched but maybe not edited (e.g. copied or re-saved), compare contents
+        digest = file_hash(file_path)
+        if cached["sha256"] == digest:
+            cached["mtime"] = mtime
+            _write_cache(cache_file, cached)
+            return cached["data"]
+
+    data = builder(file_path)
+    if data is not None:
+        _write_cache(cache_file, {
+            "version": cache_version,
+            "mtime": mtime,
+            "sha256": digest or file_hash(file_path),
+            "data": data,
+        })
+    return data
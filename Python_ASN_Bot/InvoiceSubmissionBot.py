@@ -1,13 +1,52 @@
 import asyncio
+import time
 import warnings
 import pandas as pd
 from datetime import datetime
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import requests
 
+from ResourceBlocker import disable_resource_blocking, enable_resource_blocking, report_blocked
+from RetryQueue import RetryQueue
+from StatusWriter import StatusWriter
+from Tracing import finish_trace, instrument_context, set_tag, start_trace, traced
+
 input_file = "../invoices.xlsx"
 output_file = "invoices_status.xlsx"
 target_site = "https://vendorcentral.amazon.com/hz/vendor/members/invoice-creation/search-shipments"
+po_batch_size = 10  # PO numbers searched together in one query (1 = one search per invoice like before)
+invoice_workers = 2  # Tabs creating invoices at the same time (1 = one tab like before)
+search_timeout = 10000  # ms to wait for result rows before treating a search as empty
+
+step_latency = {}  # step name -> seconds each wait took, see report_step_latency
+latency_buckets = [0.25, 0.5, 1, 2, 5, 10]  # Histogram bucket upper bounds in seconds
+
+# Reads the whole results table in one call. A row's POs are the searched POs that appear in its
+# text as a whole word (so 1234 doesn't match 12345 or an ASN number). One ASN can cover several
+# POs, so a row can belong to more than one of them. A row matching none is never clicked.
+# Rows left over from the previous search are tagged data-stale by search_pos and skipped.
+RESULT_ROWS_JS = """
+(poNumbers) => Array.from(document.querySelectorAll(".mt-row:not([data-stale])")).map((row, i) => {
+    const shipped = document.querySelector(`#r${i + 1}-shipped_date`);
+    const words = new Set(row.innerText.split(/[^A-Za-z0-9]+/));
+    return {
+        row: i + 1,
+        pos: poNumbers.filter((po) => words.has(po)),
+        shipped: shipped ? shipped.innerText.trim() : null,
+    };
+})
+"""
+
+# Makes the Create button's form open the invoice page in a new tab, so the search results stay
+# on the worker's tab. Returns false when the button isn't in a form (the page creates in place).
+NEW_TAB_FORM_JS = """
+(selector) => {
+    const button = document.querySelector(selector);
+    if (!button || !button.form) return false;
+    button.form.target = "_blank";
+    return true;
+}
+"""
 
 def parse_date(date_input):
     if isinstance(date_input, pd.Timestamp):
@@ -38,17 +77,49 @@ async def connect_browser():
         page = pages[0] if pages else await context.new_page()
         if page.url != target_site:
             await page.goto(target_site)
-        await page.wait_for_load_state("networkidle")
+        await wait_for_step(page, "search page", "#shipment-search-key", state="attached")
         await page.bring_to_front()
         return playwright, browser, page
     except Exception as e:
         print(f"❌ Error connecting to Chrome DevTools: {e}")
         return None, None, None
 
-async def wait_for_loading(page):
-    await page.wait_for_load_state("networkidle")
-    await page.wait_for_selector("body", state="visible")
+def record_latency(step, seconds):
+    step_latency.setdefault(step, []).append(seconds)
+
+async def wait_for_step(page, step, selector, state="visible", timeout=30000):
+    """
+    Waits only for the element the next step needs (instead of networkidle, which Vendor
+    Central's background requests keep pushing back) and records how long it took.
+    """
+    start = time.perf_counter()
+    try:
+        await page.wait_for_selector(selector, state=state, timeout=timeout)
+    finally:
+        record_latency(step, time.perf_counter() - start)
 
+@traced
+async def open_search_page(page):
+    await page.goto(target_site)
+    await wait_for_step(page, "search page", "#shipment-search-key", state="attached")
+
+def report_step_latency():
+    """Prints count, p50/p95/max and a histogram of the wait time for every step."""
+    if not step_latency:
+        return
+    labels = [f"<{b}s" for b in latency_buckets] + [f">={latency_buckets[-1]}s"]
+    print("\n⏱️ Wait time per step")
+    print(f"{'Step':<20}{'Count':>6}{'p50':>8}{'p95':>8}{'Max':>8}  " + " ".join(f"{label:>7}" for label in labels))
+    for step, times in step_latency.items():
+        times = sorted(times)
+        p50 = times[int(0.50 * (len(times) - 1))]
+        p95 = times[int(0.95 * (len(times) - 1))]
+        counts = [0] * len(labels)
+        for t in times:
+            counts[next((i for i, b in enumerate(latency_buckets) if t < b), len(latency_buckets))] += 1
+        print(f"{step:<20}{len(times):>6}{p50:>8.2f}{p95:>8.2f}{times[-1]:>8.2f}  " + " ".join(f"{c:>7}" for c in counts))
+
+@traced
 async def select_po_search(page):
     print("🔄 Selecting 'Purchase Order Number(s)' from dropdown...")
     await page.evaluate("""
@@ -58,102 +129,312 @@ async def select_po_search(page):
             dropdown.dispatchEvent(new Event('change', { bubbles: true }));
         }
     """)
-    await page.wait_for_timeout(500)
+    await wait_for_step(page, "po search field", "#po-number")
     selected_value = await page.evaluate("document.querySelector('#shipment-search-key').value")
     print("✅ Dropdown set to Purchase Order" if selected_value == "PURCHASE_ORDER" else "❌ Dropdown selection failed")
-    await wait_for_loading(page)
 
-async def process_invoices(page):
-    df = pd.read_excel(input_file, engine="openpyxl")
-    output_data = []
+def read_invoices(df):
+    """Turns invoices.xlsx rows into invoice dicts, skipping rows that can't be read."""
+    invoices = []
     for row_index, row in df.iterrows():
         try:
-            await select_po_search(page)
             po_number = str(row.iloc[0]).strip()
             if not po_number:
                 continue
-            ship_date = parse_date(row["Invoice Date"])
-            invoice_number = str(row.iloc[2]).strip()
-            invoice_amount = float(row.iloc[3])
-            print(f"Processing PO: {po_number}")
-            await wait_for_loading(page)
-            po_number_input = await page.wait_for_selector("#po-number", timeout=30000)
-            await po_number_input.scroll_into_view_if_needed()
-            await po_number_input.click()
-            await po_number_input.fill(po_number)
-            await page.click("#shipmentSearchTableForm-submit")
-            await wait_for_loading(page)
-            try:
-                rows = await page.query_selector_all(".mt-row")
-            except:
-                print("⚠️ Could not query rows. Retrying...")
-                await page.goto(target_site)
-                await wait_for_loading(page)
-                continue
-            if not rows:
-                print("⚠️ No PO found")
-                output_data.append([po_number, invoice_number, invoice_amount, 0, "Not Available"])
-                continue
-            for r in range(len(rows)):
-                try:
-                    shipped_date_text = await page.locator(f"#r{r+1}-shipped_date").inner_text()
-                    if parse_date(shipped_date_text.strip()) == ship_date:
-                        await page.click(f"#r{r+1}-asn_checkbox-input-harmonic-checkbox ~ i")
-                        await page.click("#create-inv-asn-po-toggle")
-                        await wait_for_loading(page)
-                        if await page.locator("input[data-asn-check='true']").is_checked():
-                            await page.locator("input[data-asn-check='true']").click()
-                            await page.locator(f"input[data-po-check='true'][value='{po_number}']").click()
-                        await page.click("input.a-button-input[aria-labelledby='create-invoice-submit-announce']")
-                        await wait_for_loading(page)
-                        await page.wait_for_selector("#inv-total-amount-data")
-                        await page.wait_for_function("""
-                            () => {
-                                const el = document.querySelector("#inv-total-amount-data");
-                                return el && el.innerText.trim() !== "...";
-                            }
-                        """, timeout=5000)
-                        total = await page.locator("#inv-total-amount-data").inner_text()
-                        total = float(total.replace("$", "").replace(",", "").strip())
-                        if abs(total - invoice_amount) < 0.01:
-                            print("✅ USD Match")
-                            await page.fill("#invoice-number", f"{int(invoice_number)}")
-                            checkbox = await page.wait_for_selector("#inv-agree-checkbox")
-                            await checkbox.scroll_into_view_if_needed()
-                            if not await checkbox.is_checked():
-                                await checkbox.check()
-                            await page.wait_for_selector(".melodic-loading-overlay", state="hidden", timeout=5000)
-                            await page.click("input.a-button-input[aria-labelledby='inv-submit-announce']")
-                            await wait_for_loading(page)
-                            await page.click("#inv-crt-redirect")
-                            await wait_for_loading(page)
-                            output_data.append([po_number, invoice_number, invoice_amount, total, "Submitted"])
-                        else:
-                            print("⚠️ Amount mismatch")
-                            output_data.append([po_number, invoice_number, invoice_amount, total, "Price error"])
-                            await page.goto(target_site)
-                            await wait_for_loading(page)
-                        break
-                except Exception as e:
-                    print(f"⚠️ Skipping row {r+1} due to error: {e}")
-                    continue
+            invoices.append({
+                "row": row_index,
+                "po": po_number,
+                "ship_date": parse_date(row["Invoice Date"]),
+                "number": str(row.iloc[2]).strip(),
+                "amount": float(row.iloc[3]),
+            })
         except Exception as outer:
             print(f"❌ Error on PO {row.iloc[0]}: {outer}")
+    return invoices
+
+def batch_invoices(invoices):
+    """
+    Groups invoices by PO (in order of first appearance) into batches of at most
+    po_batch_size different PO numbers, so rows sharing a PO are always searched together.
+    """
+    by_po = {}
+    for invoice in invoices:
+        by_po.setdefault(invoice["po"], []).append(invoice)
+    po_numbers = list(by_po)
+    return [
+        [invoice for po in po_numbers[i:i + po_batch_size] for invoice in by_po[po]]
+        for i in range(0, len(po_numbers), po_batch_size)
+    ]
+
+@traced
+async def search_pos(page, po_numbers):
+    """
+    Runs one shipment search for all the given PO numbers.
+    Returns False if no result rows showed up within search_timeout.
+    """
+    await select_po_search(page)
+    print(f"Processing PO(s): {', '.join(po_numbers)}")
+    po_number_input = await page.wait_for_selector("#po-number", timeout=30000)
+    await po_number_input.scroll_into_view_if_needed()
+    await po_number_input.click()
+    await po_number_input.fill(", ".join(po_numbers))
+    # Mark the current rows so only rows from this search count as loaded
+    await page.evaluate("document.querySelectorAll('.mt-row').forEach((row) => row.setAttribute('data-stale', ''))")
+    await page.click("#shipmentSearchTableForm-submit")
+    try:
+        await wait_for_step(page, "search results", ".mt-row:not([data-stale])", state="attached", timeout=search_timeout)
+    except PlaywrightTimeoutError:
+        print(f"⚠️ No results within {search_timeout / 1000:.0f}s")
+        return False
+    return True
+
+@traced
+async def index_results(page, po_numbers):
+    """
+    Parses the .mt-row results table once into {(PO, shipped date): row number}.
+    A row listing several of the POs is indexed under each of them.
+    """
+    index = {}
+    for result in await page.evaluate(RESULT_ROWS_JS, po_numbers):
+        try:
+            shipped = parse_date(result["shipped"])
+        except ValueError:
             continue
-    pd.DataFrame(output_data, columns=["PO Number", "Invoice Number", "Invoice Amount", "Total Amount", "Status"]).to_excel(output_file, index=False)
+        for po in result["pos"]:
+            index.setdefault((po, shipped), result["row"])
+    return index
+
+@traced
+async def create_invoice(page, row_number, invoice, writer):
+    """
+    Creates and submits the invoice for results row `row_number` of the current search.
+    When the Create button submits a form, the invoice page is opened in a tab of its own and
+    the results stay on `page` for the next invoice of the batch. Returns True if they did.
+    """
+    po_number = invoice["po"]
+    row_checkbox = f"#r{row_number}-asn_checkbox-input-harmonic-checkbox ~ i"
+    create_button = "input.a-button-input[aria-labelledby='create-invoice-submit-announce']"
+    start = time.perf_counter()
+
+    await page.click(row_checkbox)
+    await page.click("#create-inv-asn-po-toggle")
+    await wait_for_step(page, "po toggle", "input[data-asn-check='true']", state="attached")
+    if await page.locator("input[data-asn-check='true']").is_checked():
+        await page.locator("input[data-asn-check='true']").click()
+        await page.locator(f"input[data-po-check='true'][value='{po_number}']").click()
+    if not await page.evaluate(NEW_TAB_FORM_JS, create_button):
+        # Created in place, which leaves the results page
+        await page.click(create_button)
+        await fill_invoice(page, invoice, writer, in_new_tab=False)
+        record_latency("invoice (total)", time.perf_counter() - start)
+        return False
+
+    async with page.expect_popup() as popup:
+        await page.click(create_button)
+    invoice_page = await popup.value
+    try:
+        await page.click(row_checkbox)  # Untick the row again for the next invoice
+        await fill_invoice(invoice_page, invoice, writer, in_new_tab=True)
+    finally:
+        await invoice_page.close()
+    record_latency("invoice (total)", time.perf_counter() - start)
+    return True
+
+async def fill_invoice(page, invoice, writer, in_new_tab):
+    """Checks the invoice total, then fills in the invoice number and submits it."""
+    po_number = invoice["po"]
+    invoice_number = invoice["number"]
+    invoice_amount = invoice["amount"]
+
+    await wait_for_step(page, "invoice form", "#inv-total-amount-data")
+    await page.wait_for_function("""
+        () => {
+            const el = document.querySelector("#inv-total-amount-data");
+            return el && el.innerText.trim() !== "...";
+        }
+    """, timeout=5000)
+    total = await page.locator("#inv-total-amount-data").inner_text()
+    total = float(total.replace("$", "").replace(",", "").strip())
+    if abs(total - invoice_amount) < 0.01:
+        print("✅ USD Match")
+        await page.fill("#invoice-number", f"{int(invoice_number)}")
+        checkbox = await page.wait_for_selector("#inv-agree-checkbox")
+        await checkbox.scroll_into_view_if_needed()
+        if not await checkbox.is_checked():
+            await checkbox.check()
+        await page.wait_for_selector(".melodic-loading-overlay", state="hidden", timeout=5000)
+        invoice["submitted"] = True  # From here on a retry could create the invoice twice
+        await page.click("input.a-button-input[aria-labelledby='inv-submit-announce']")
+        await wait_for_step(page, "invoice submit", "#inv-crt-redirect")
+        if not in_new_tab:
+            await page.click("#inv-crt-redirect")
+            await wait_for_step(page, "search page", "#shipment-search-key", state="attached")
+        writer.write([po_number, invoice_number, invoice_amount, total, "Submitted"])
+    else:
+        print("⚠️ Amount mismatch")
+        writer.write([po_number, invoice_number, invoice_amount, total, "Price error"])
+        if not in_new_tab:
+            await open_search_page(page)
+
+def invoice_failed(invoice, error, writer, retries):
+    """Puts the invoice back for a retry, or logs it as an error if it can't be retried."""
+    key = f"PO {invoice['po']} / invoice {invoice['number']}"
+    if invoice.get("submitted") or not retries.schedule(key, invoice, error):
+        writer.write([invoice["po"], invoice["number"], invoice["amount"], 0, "Error"])
+
+async def recover_search_page(page, invoices, writer):
+    """
+    Goes back to the search page after a failure. If that fails too, the invoices still
+    to do are logged as errors and False is returned so the batch stops there.
+    """
+    try:
+        await open_search_page(page)
+        return True
+    except Exception as e:
+        print(f"❌ Could not get back to the search page: {e}")
+        for invoice in invoices:
+            writer.write([invoice["po"], invoice["number"], invoice["amount"], 0, "Error"])
+        return False
+
+async def process_batch(page, batch, writer, retries):
+    """
+    Searches every PO in the batch with one query and drives invoice creation from the
+    parsed results. Invoices are created in their own tab, so the results page is kept for
+    the whole batch. Only if the site creates an invoice in place (leaving the results page)
+    are the remaining POs searched again.
+    Invoices that fail on a timeout are put on `retries`; other failures are logged as errors.
+    Returns the number of searches run.
+    """
+    searches = 0
+    remaining = batch
+    index = None
+    while remaining:
+        po_numbers = list(dict.fromkeys(invoice["po"] for invoice in remaining))
+        set_tag(", ".join(po_numbers))
+        if index is None:
+            try:
+                searches += 1
+                # Nothing loaded: report the POs as not found rather than read the old rows
+                index = await index_results(page, po_numbers) if await search_pos(page, po_numbers) else {}
+            except Exception as e:
+                print(f"⚠️ Could not search PO(s) {', '.join(po_numbers)}: {e}")
+                for invoice in remaining:
+                    invoice_failed(invoice, e, writer, retries)
+                await recover_search_page(page, [], writer)
+                break
+
+        found_pos = {po for po, _ in index}
+        to_create = []
+        for invoice in remaining:
+            if invoice["po"] not in found_pos:
+                print(f"⚠️ No PO found: {invoice['po']}")
+                writer.write([invoice["po"], invoice["number"], invoice["amount"], 0, "Not Available"])
+            elif (invoice["po"], invoice["ship_date"]) not in index:
+                print(f"⚠️ No shipment on {invoice['ship_date']:%m/%d/%Y} for PO {invoice['po']}")
+            else:
+                to_create.append(invoice)
+        if not to_create:
+            break
+
+        invoice, remaining = to_create[0], to_create[1:]
+        row_number = index[(invoice["po"], invoice["ship_date"])]
+        set_tag(invoice["po"])
+        try:
+            if not await create_invoice(page, row_number, invoice, writer):
+                index = None  # No longer on the results page
+        except Exception as e:
+            print(f"⚠️ Skipping row {row_number} due to error: {e}")
+            invoice_failed(invoice, e, writer, retries)
+            index = None
+            if not await recover_search_page(page, remaining, writer):
+                break
+    return searches
+
+async def invoice_worker(worker_page, queue, writer, searches, retries):
+    """
+    Pulls PO batches off the shared queue and runs search -> create -> submit on this worker's tab.
+    Every invoice for a PO is in the same batch, so no PO is handled by two tabs.
+    A batch that fails outright is logged as errors (except invoices already waiting for a retry)
+    so the other tabs and the status file carry on.
+    """
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            break
+        try:
+            searches.append(await process_batch(worker_page, batch, writer, retries))
+        except Exception as e:
+            print(f"❌ Batch {', '.join(dict.fromkeys(invoice['po'] for invoice in batch))} failed: {e}")
+            logged = {(row[0], row[1]) for row in writer.rows}
+            retrying = [item for _, _, item in retries.pending]
+            for invoice in batch:
+                if (invoice["po"], invoice["number"]) not in logged and not any(item is invoice for item in retrying):
+                    writer.write([invoice["po"], invoice["number"], invoice["amount"], 0, "Error"])
+
+async def process_invoices(page):
+    df = pd.read_excel(input_file, engine="openpyxl")
+    writer = StatusWriter(output_file, ["PO Number", "Invoice Number", "Invoice Amount", "Total Amount", "Status"])
+    invoices = read_invoices(df)
+    batches = batch_invoices(invoices)
+
+    worker_count = max(1, min(invoice_workers, len(batches)))
+    worker_pages = [page]
+    try:
+        for _ in range(worker_count - 1):
+            worker_page = await page.context.new_page()
+            await open_search_page(worker_page)
+            worker_pages.append(worker_page)
+        print(f"🧵 Processing {len(invoices)} invoice(s) in {len(batches)} batch(es) with {len(worker_pages)} tab(s)")
+
+        searches = []
+        retries = RetryQueue("invoice(s)")
+        while batches:
+            queue = asyncio.Queue()
+            for batch in batches:
+                queue.put_nowait(batch)
+            for _ in worker_pages:
+                queue.put_nowait(None)  # One stop signal per worker
+
+            await asyncio.gather(*[
+                invoice_worker(worker_page, queue, writer, searches, retries)
+                for worker_page in worker_pages
+            ])
+            # Timed out invoices, once their backoff is over
+            batches = batch_invoices(list((await retries.due()).values()))
+        retries.report()
+    finally:
+        for worker_page in worker_pages[1:]:
+            await worker_page.close()
+        writer.stop()
+
+    print(f"🔎 {sum(searches)} search(es) for {len(invoices)} invoice(s)")
+    report_step_latency()
+    # Same PO order as invoices.xlsx no matter which tab finished first
+    await writer.close(dict.fromkeys(invoice["po"] for invoice in invoices))
     print("✅ Invoice statuses saved.")
 
-async def run_script():
+async def run_script(page=None):
+    """A page passed in by SessionDaemon is used as is and its browser is left open."""
     warnings.filterwarnings("ignore", category=ResourceWarning)
-    playwright, browser, page = await connect_browser()
+    if page:
+        playwright, browser = None, None  # Owned by SessionDaemon
+        await open_search_page(page)
+    else:
+        playwright, browser, page = await connect_browser()
     if not page:
         print("❌ No valid page found. Exiting.")
         return
+    await enable_resource_blocking(page.context)
+    start_trace()
+    instrument_context(page.context)
     try:
         await process_invoices(page)
+        report_blocked()
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
     finally:
+        finish_trace("InvoiceSubmissionBot")
+        await disable_resource_blocking(page.context)
         if browser:
             await browser.close()
         if playwright:
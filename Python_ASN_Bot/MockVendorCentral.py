@@ -0,0 +1,506 @@
+"""
+Local stand-in for the Vendor Central pages the bots drive, for benchmarks and dry runs.
+
+Serves the shipping queue (rdt_TableRow rows, sq-pag-next-div paging and the JSON the table
+is rendered from), the asnsubmission steps with the carton grid, labelmapping, shipmentdetail
+and the invoice-creation search and create pages, all under the same paths as the live site.
+Every response waits `response_latency` and every click that changes a step waits
+`action_latency`, so timings look like the real site instead of an instant local page.
+
+The pages only check what the bots need to get right (tracking numbers set, dates filled,
+carton counts adding up, invoice total); everything that went through is counted in `events`.
+"""
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+mock_host = "127.0.0.1"
+mock_port = 9444
+response_latency = 0.2  # Seconds every page / API response is held back
+action_latency = 0.3  # Seconds the page takes to react to a step button or a search
+
+arn_count = 20  # Shipments on the pickup date
+rows_per_page = 10  # Shipping queue rows per page
+skus_per_arn = 4
+invoice_count = 20
+seed = 7  # Same seed, same shipments, POs and amounts every run
+
+warehouses = {"ABE8": "Allentown, PA", "ONT8": "Moreno Valley, CA", "MDW2": "Joliet, IL", "FTW1": "Dallas, TX", "SBD1": "Bloomington, CA"}
+
+fixtures = {"shipments": [], "invoices": []}  # Set by build_fixtures
+events = {}  # Event type ("asn", "labels", "print", "invoice", ...) -> keys, in the order they happened
+events_lock = threading.Lock()
+
+
+def build_fixtures(pickup_date):
+    """
+    Generates the shipments and invoices the mock serves. `arn_count` shipments are picked up on
+    pickup_date, followed by two pages picked up the day after so the bots stop paging on their own.
+    """
+    rng = random.Random(seed)
+    day = datetime.strptime(pickup_date, "%m/%d/%Y")
+    codes = list(warehouses)
+
+    shipments = []
+    for i in range(arn_count + 2 * rows_per_page):
+        arn = str(5100000000 + i)
+        skus = []
+        for j in range(skus_per_arn):
+            master = rng.choice([6, 12, 24])
+            pack = rng.randint(1, master - 1) if rng.random() < 0.2 else master * rng.randint(1, 5)
+            skus.append({
+                "asin": f"B0{rng.randrange(16 ** 8):08X}",
+                "po": f"{rng.randint(1, 9)}{rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ')}{rng.randint(100000, 999999)}",
+                "model": f"MDL-{i:03d}-{j}",
+                "pack": pack,
+                "master": master,
+            })
+        cartons = rng.randint(4, 12)
+        shipments.append({
+            "arn": arn,
+            "asn_id": str(90000000 + i),
+            "pickup": day if i < arn_count else day + timedelta(days=1),
+            "warehouse": codes[i % len(codes)],
+            "skus": skus,
+            "cartons": [f"AMZN{arn[-6:]}{c:04d}" if c % 6 else f"SSCC{arn[-6:]}{c:04d}" for c in range(1, cartons + 1)],
+            "tracking": [f"1Z{rng.randrange(10 ** 14):014d}" for _ in range(cartons)],
+        })
+
+    invoices = [
+        {
+            "po": f"{rng.randint(1, 9)}{rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ')}{rng.randint(100000, 999999)}",
+            "shipped": day - timedelta(days=rng.randint(1, 20)),
+            "number": 700000 + k,
+            "amount": round(rng.uniform(50, 5000), 2),
+        }
+        for k in range(invoice_count)
+    ]
+
+    fixtures.update(shipments=shipments, invoices=invoices)
+    return fixtures
+
+
+def pickup_text(day):
+    """datetime -> 'Mar 10, 2025' like the shipping queue labels."""
+    return f"{day:%b} {day.day}, {day.year}"
+
+
+def record_event(kind, key):
+    with events_lock:
+        events.setdefault(kind, []).append(key)
+
+
+# Custom elements standing in for the kat-* components. kat-input and kat-date-picker keep
+# their <input> in a shadow root like the live site. kat-button clicks go to `handlers[label]`.
+COMPONENTS_JS = """
+const later = (fn, delay = MOCK.actionDelay) => setTimeout(fn, delay);
+const mockEvent = (type, key) => fetch('/mock/event', {method: 'POST', body: JSON.stringify({type, key})});
+const app = document.getElementById('app');
+const handlers = {};
+
+class KatText extends HTMLElement {
+    connectedCallback() { this.textContent = this.getAttribute('label') || this.getAttribute('text') || ''; }
+}
+customElements.define('kat-button', class extends KatText {});
+customElements.define('kat-label', class extends KatText {});
+customElements.define('kat-link', class extends KatText {});
+customElements.define('kat-input', class extends HTMLElement {
+    connectedCallback() {
+        if (!this.shadowRoot) {
+            this.attachShadow({mode: 'open'}).innerHTML = `<input placeholder="${this.getAttribute('placeholder') || ''}">`;
+        }
+    }
+    get value() { return this.shadowRoot ? this.shadowRoot.querySelector('input').value : ''; }
+});
+customElements.define('kat-date-picker', class extends HTMLElement {
+    connectedCallback() {
+        if (!this.shadowRoot) this.attachShadow({mode: 'open'}).innerHTML = '<kat-input placeholder="MM/DD/YYYY"></kat-input>';
+    }
+    get value() { return this.shadowRoot.querySelector('kat-input').value; }
+});
+
+document.addEventListener('click', (e) => {
+    const button = e.target.closest('kat-button');
+    if (button && handlers[button.getAttribute('label')]) handlers[button.getAttribute('label')](button);
+});
+"""
+
+PAGE_CSS = """
+body { font-family: sans-serif; }
+kat-button, kat-link, kat-label { display: inline-block; padding: 4px 8px; margin: 2px; }
+kat-button { border: 1px solid #888; cursor: pointer; }
+kat-input, kat-date-picker { display: inline-block; margin: 2px; }
+.rdt_TableRow, div[role='row'], .mt-row { display: block; padding: 2px; border-bottom: 1px solid #ddd; }
+.rdt_TableCell, div[col-id] { display: inline-block; min-width: 120px; min-height: 18px; vertical-align: top; }
+.ag-rich-select-list { position: fixed; top: 10px; right: 10px; background: #fff; border: 1px solid #888; }
+.ag-rich-select-row { padding: 2px 8px; cursor: pointer; }
+i.cb { display: inline-block; width: 14px; height: 14px; border: 1px solid #333; cursor: pointer; }
+"""
+
+PAGE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>__TITLE__ (mock)</title><style>__CSS__</style></head>
+<body><div id="app"></div>
+<script>const MOCK = __DATA__;</script>
+<script>__COMPONENTS__</script>
+<script>__SCRIPT__</script>
+</body></html>"""
+
+QUEUE_JS = """
+// Filter, sort and page size come from the page URL like the queue's own controls
+const params = new URLSearchParams(location.search);
+let pageIndex = Math.max(0, parseInt(params.get('page') || '1', 10) - 1);
+params.delete('page');
+let hasNext = false;
+app.innerHTML = '<div id="rows"></div><div id="sq-pag-next-div">Next</div>';
+
+async function loadPage() {
+    params.set('page', pageIndex);
+    const response = await fetch(`/kt/vendor/members/afi-shipment-mgr/api/shippingqueue?${params}`);
+    const payload = await response.json();
+    hasNext = payload.hasNext;
+    document.getElementById('rows').innerHTML = payload.shipments.map((s, i) => `
+        <div class="rdt_TableRow">
+            <kat-link id="sq-table-arn-link-${i}" label="${s.arn}" href="/kt/vendor/members/afi-shipment-mgr/shipmentdetail?rr=${s.arn}&asn=${s.asnId}"></kat-link>
+            <kat-label id="sq-table-sl2-${i}" text="Pickup: ${s.pickupText}"></kat-label>
+            <kat-label id="sq-table-date-${i}" text="${s.pickupText}"></kat-label>
+            <kat-label id="sq-table-st-to-${i}" text="${s.shipTo}"></kat-label>
+            <kat-label id="sq-table-st-from-${i}" text="${s.shipFrom}"></kat-label>
+        </div>`).join('');
+}
+
+document.getElementById('sq-pag-next-div').addEventListener('click', () => {
+    if (hasNext) {
+        pageIndex += 1;
+        loadPage();
+    }
+});
+loadPage();
+"""
+
+ASN_SUBMISSION_JS = """
+const shipment = MOCK.shipment;
+const rows = shipment.cartons.map((label) => ({cartonLabelBarcode: label, carrierTrackingNumber: ''}));
+
+// Just enough of ag-Grid's API for ASNBot's fast path
+const gridApi = {
+    getDisplayedRowCount: () => rows.length,
+    getDisplayedRowAtIndex: (i) => ({
+        data: rows[i],
+        setDataValue: (column, value) => {
+            rows[i][column] = value;
+            const cell = app.querySelector(`div[row-index="${i}"] div[col-id="${column}"]`);
+            if (cell) cell.textContent = value;
+        },
+    }),
+    getColumn: (id) => ({
+        getColDef: () => ({field: id, cellEditorParams: id === 'carrierTrackingNumber' ? {values: shipment.tracking} : {}}),
+    }),
+    refreshCells: () => {},
+};
+
+function renderGrid() {
+    app.innerHTML = `
+        <div class="ag-root-wrapper">
+            <div role="row" class="ag-header-row">
+                <div col-id="cartonLabelBarcode">Carton label</div><div col-id="carrierTrackingNumber">Tracking number</div>
+            </div>
+            ${rows.map((row, i) => `
+                <div role="row" row-index="${i}">
+                    <div col-id="cartonLabelBarcode">${row.cartonLabelBarcode}</div><div col-id="carrierTrackingNumber"></div>
+                </div>`).join('')}
+        </div>
+        <kat-button label="Continue to step 4"></kat-button>`;
+    app.querySelector('.ag-root-wrapper').__agComponent = {gridApi};
+}
+
+// The rich select dropdown, for the click-every-row path
+app.addEventListener('dblclick', (e) => {
+    const cell = e.target.closest("div[row-index] div[col-id='carrierTrackingNumber']");
+    if (!cell) return;
+    const index = Number(cell.parentElement.getAttribute('row-index'));
+    document.querySelector('.ag-rich-select-list')?.remove();
+    const list = document.createElement('div');
+    list.className = 'ag-rich-select-list';
+    list.innerHTML = shipment.tracking.map((t) => `<div class="ag-rich-select-row">${t}</div>`).join('');
+    list.addEventListener('click', (event) => {
+        const option = event.target.closest('.ag-rich-select-row');
+        if (!option) return;
+        gridApi.getDisplayedRowAtIndex(index).setDataValue('carrierTrackingNumber', option.textContent);
+        list.remove();
+    });
+    document.body.appendChild(list);
+});
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') document.querySelector('.ag-rich-select-list')?.remove();
+});
+
+handlers['Continue to step 2'] = () => later(() => {
+    app.innerHTML = '<h3>Step 2: Confirm quantities</h3><kat-button label="Continue to step 3"></kat-button>';
+});
+handlers['Continue to step 3'] = () => later(renderGrid);
+handlers['Continue to step 4'] = () => later(() => {
+    app.innerHTML = `
+        <kat-date-picker id="asnlabel-shipdate-picker"></kat-date-picker>
+        <kat-date-picker id="asnlabel-edd-picker"></kat-date-picker>
+        <kat-button label="Confirm and submit shipment" disabled></kat-button>`;
+});
+handlers['Confirm and submit shipment'] = (button) => {
+    if (button.hasAttribute('disabled')) return;
+    const missing = rows.filter((row) => row.cartonLabelBarcode.startsWith('AMZN') && !row.carrierTrackingNumber).length;
+    const dates = Array.from(document.querySelectorAll('kat-date-picker'), (picker) => picker.value);
+    later(() => {
+        if (missing || dates.some((date) => !/^\\d\\d\\/\\d\\d\\/\\d{4}$/.test(date))) {
+            app.innerHTML = `<h3>Can't submit: ${missing} carton(s) without tracking, dates ${dates.join(' / ')}</h3>`;
+            mockEvent('asn-rejected', shipment.arn);
+        } else {
+            app.innerHTML = '<h3>Shipment submitted</h3>';
+            mockEvent('asn', shipment.arn);
+        }
+    });
+};
+
+app.innerHTML = `<h3>ASN ${shipment.arn}</h3><kat-button label="Continue to step 2"></kat-button>`;
+"""
+
+LABEL_MAPPING_JS = """
+const shipment = MOCK.shipment;
+const headers = ['SKU', 'Title', 'Ordered', 'Confirmed', 'Packed', 'Cartons'];
+let confirmed = false;
+
+handlers['Continue to step 2'] = () => later(() => {
+    app.innerHTML = `
+        <label><input type="radio" name="packingMethod" value="carton"> Cartons</label>
+        <label><input type="radio" name="packingMethod" value="pallet"> Pallets</label>
+        <div><kat-input placeholder="Search SKUs"></kat-input><kat-input placeholder="Carton weight"></kat-input></div>
+        <div class="rdt_TableRow">${headers.map((h) => `<div class="rdt_TableCell">${h}</div>`).join('')}</div>
+        ${shipment.skus.map((sku, i) => `
+            <div class="rdt_TableRow">
+                <div class="rdt_TableCell"><div class="sb-asinRow-detail-div">Purchase order: ${sku.po}<br>ASIN: ${sku.asin}<br>Model: ${sku.model}</div></div>
+                <div class="rdt_TableCell">Item ${i + 1}</div>
+                <div class="rdt_TableCell">${sku.pack}</div>
+                <div class="rdt_TableCell">${sku.pack}</div>
+                <div class="rdt_TableCell">0 / ${sku.pack}</div>
+                <div class="rdt_TableCell">
+                    <kat-input placeholder="Units per carton"></kat-input><kat-input placeholder="Cartons"></kat-input><kat-input placeholder="Weight"></kat-input>
+                </div>
+            </div>`).join('')}
+        <kat-button label="Confirm all SKUs"></kat-button>
+        <kat-button label="Confirm and print labels"></kat-button>`;
+});
+handlers['Confirm all SKUs'] = () => {
+    const inputs = Array.from(document.querySelectorAll('kat-input')).slice(2);
+    confirmed = shipment.skus.every((sku, i) => Number(inputs[3 * i].value) * Number(inputs[3 * i + 1].value) === sku.pack);
+};
+handlers['Confirm and print labels'] = () => later(() => {
+    app.innerHTML = confirmed ? '<h3>Labels ready</h3>' : '<h3>Carton counts do not match</h3>';
+    mockEvent(confirmed ? 'labels' : 'labels-rejected', shipment.arn);
+});
+
+app.innerHTML = `<h3>Label mapping ${shipment.arn}</h3><kat-button label="Continue to step 2"></kat-button>`;
+"""
+
+SHIPMENT_DETAIL_JS = """
+handlers['Print shipping labels'] = () => mockEvent('print', MOCK.arn);
+app.innerHTML = `<h3>Shipment ${MOCK.arn}</h3><kat-button label="Print shipping labels"></kat-button>`;
+"""
+
+INVOICE_SEARCH_JS = """
+const money = (amount) => '$' + amount.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+let results = [];
+
+app.innerHTML = `
+    <div id="search">
+        <select id="shipment-search-key">
+            <option value="SHIPMENT_ID">Shipment ID</option>
+            <option value="PURCHASE_ORDER">Purchase Order Number(s)</option>
+        </select>
+        <span id="search-fields"></span>
+        <input type="button" id="shipmentSearchTableForm-submit" value="Search">
+        <div id="results"></div>
+        <input type="button" id="create-inv-asn-po-toggle" value="Create invoice">
+        <div id="create-panel"></div>
+    </div>`;
+
+document.getElementById('shipment-search-key').addEventListener('change', (e) => {
+    if (e.target.value === 'PURCHASE_ORDER' && !document.getElementById('po-number')) {
+        later(() => { document.getElementById('search-fields').innerHTML = '<input id="po-number">'; });
+    }
+});
+
+document.getElementById('shipmentSearchTableForm-submit').addEventListener('click', () => {
+    const poNumbers = document.getElementById('po-number').value.split(/[,\\s]+/).filter(Boolean);
+    later(() => {
+        results = MOCK.invoices.filter((invoice) => poNumbers.includes(invoice.po));
+        document.getElementById('results').innerHTML = results.map((invoice, i) => `
+            <div class="mt-row">
+                <input type="checkbox" id="r${i + 1}-asn_checkbox-input-harmonic-checkbox"><i class="cb"></i>
+                PO ${invoice.po} <span id="r${i + 1}-shipped_date">${invoice.shipped}</span> ${money(invoice.amount)}
+            </div>`).join('');
+    });
+});
+
+document.getElementById('results').addEventListener('click', (e) => {
+    if (e.target.matches('i.cb')) e.target.previousElementSibling.checked = !e.target.previousElementSibling.checked;
+});
+
+const selected = () => results.filter((_, i) => document.getElementById(`r${i + 1}-asn_checkbox-input-harmonic-checkbox`).checked);
+
+document.getElementById('create-inv-asn-po-toggle').addEventListener('click', () => {
+    document.getElementById('create-panel').innerHTML = `
+        <form action="/hz/vendor/members/invoice-creation/create-invoice" method="get">
+            <label><input type="checkbox" data-asn-check="true" checked> By ASN</label>
+            ${selected().map((invoice) => `<label><input type="checkbox" data-po-check="true" value="${invoice.po}"> ${invoice.po}</label>
+                <input type="hidden" name="po" value="${invoice.po}">`).join('')}
+            <input type="submit" class="a-button-input" aria-labelledby="create-invoice-submit-announce" value="Create">
+        </form>`;
+});
+"""
+
+INVOICE_FORM_JS = """
+const money = (amount) => '$' + amount.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+app.innerHTML = `
+    <div id="invoice">
+        <div id="inv-total-amount-data">...</div>
+        <input id="invoice-number">
+        <label><input type="checkbox" id="inv-agree-checkbox"> I agree</label>
+        <div class="melodic-loading-overlay" style="display: none"></div>
+        <input type="button" class="a-button-input" aria-labelledby="inv-submit-announce" value="Submit">
+    </div>`;
+later(() => { document.getElementById('inv-total-amount-data').textContent = money(MOCK.total); });
+document.querySelector("input[aria-labelledby='inv-submit-announce']").addEventListener('click', () => {
+    if (!document.getElementById('invoice-number').value || !document.getElementById('inv-agree-checkbox').checked) return;
+    later(() => {
+        document.getElementById('invoice').innerHTML = '<a id="inv-crt-redirect" href="/hz/vendor/members/invoice-creation/search-shipments">Create another invoice</a>';
+        MOCK.pos.forEach((po) => mockEvent('invoice', po));
+    });
+});
+"""
+
+
+def render_page(title, data, script):
+    data = dict(data, actionDelay=int(action_latency * 1000))
+    return (
+        PAGE_HTML
+        .replace("__TITLE__", title)
+        .replace("__CSS__", PAGE_CSS)
+        .replace("__DATA__", json.dumps(data))
+        .replace("__COMPONENTS__", COMPONENTS_JS)
+        .replace("__SCRIPT__", script)
+    )
+
+
+def find_shipment(arn):
+    return next((s for s in fixtures["shipments"] if s["arn"] == arn), None)
+
+
+def queue_payload(page_index, query=None):
+    """
+    One page of the shipping queue in the shape QueueScraper.parse_queue_payload reads.
+    Honors pickupDateFrom / pickupDateTo (YYYY-MM-DD), sort=pickupDate:asc and pageSize.
+    """
+    query = query or {}
+    shipments = fixtures["shipments"]
+    if query.get("pickupDateFrom"):
+        shipments = [s for s in shipments if s["pickup"].strftime("%Y-%m-%d") >= query["pickupDateFrom"]]
+    if query.get("pickupDateTo"):
+        shipments = [s for s in shipments if s["pickup"].strftime("%Y-%m-%d") <= query["pickupDateTo"]]
+    if query.get("sort") == "pickupDate:asc":
+        shipments = sorted(shipments, key=lambda s: s["pickup"])
+    size = max(1, min(int(query.get("pageSize", rows_per_page)), 100))
+    total = len(shipments)
+    shipments = shipments[page_index * size:(page_index + 1) * size]
+    return {
+        "hasNext": (page_index + 1) * size < total,
+        "shipments": [
+            {
+                "arn": s["arn"],
+                "asnId": s["asn_id"],
+                "pickupDate": s["pickup"].strftime("%Y-%m-%d"),
+                "pickupText": pickup_text(s["pickup"]),
+                "shipTo": f"{s['warehouse']}, {warehouses[s['warehouse']]}",
+                "shipFrom": "Vendor Warehouse, Reno, NV",
+            }
+            for s in shipments
+        ],
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+
+    def send_body(self, body, content_type="text/html; charset=utf-8", status=200):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(response_latency)
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path
+
+        if path.endswith("/afi-shipment-mgr/shippingqueue"):
+            self.send_body(render_page("Shipping queue", {}, QUEUE_JS))
+        elif path.endswith("/afi-shipment-mgr/api/shippingqueue"):
+            self.send_body(json.dumps(queue_payload(int(query.get("page", 0)), query)), "application/json")
+        elif path.endswith("/afi-shipment-mgr/asnsubmission") and find_shipment(query.get("arn")):
+            shipment = find_shipment(query["arn"])
+            data = {"shipment": {key: shipment[key] for key in ("arn", "cartons", "tracking")}}
+            self.send_body(render_page("ASN submission", data, ASN_SUBMISSION_JS))
+        elif path.endswith("/afi-shipment-mgr/labelmapping") and find_shipment(query.get("arn")):
+            shipment = find_shipment(query["arn"])
+            data = {"shipment": {"arn": shipment["arn"], "skus": shipment["skus"]}}
+            self.send_body(render_page("Label mapping", data, LABEL_MAPPING_JS))
+        elif path.endswith("/afi-shipment-mgr/shipmentdetail") and find_shipment(query.get("rr")):
+            self.send_body(render_page("Shipment detail", {"arn": query["rr"]}, SHIPMENT_DETAIL_JS))
+        elif path.endswith("/invoice-creation/search-shipments"):
+            invoices = [
+                {"po": invoice["po"], "shipped": f"{invoice['shipped']:%m/%d/%Y}", "amount": invoice["amount"]}
+                for invoice in fixtures["invoices"]
+            ]
+            self.send_body(render_page("Invoice creation", {"invoices": invoices}, INVOICE_SEARCH_JS))
+        elif path.endswith("/invoice-creation/create-invoice"):
+            pos = parse_qs(url.query).get("po", [])
+            total = sum(invoice["amount"] for invoice in fixtures["invoices"] if invoice["po"] in pos)
+            self.send_body(render_page("Create invoice", {"pos": pos, "total": round(total, 2)}, INVOICE_FORM_JS))
+        else:
+            self.send_body("Not found", "text/plain", 404)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/mock/event":
+            self.send_body("Not found", "text/plain", 404)
+            return
+        event = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        record_event(event.get("type"), event.get("key"))
+        self.send_body("{}", "application/json")
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown out the bots' own output
+
+
+def start_server(pickup_date, port=mock_port):
+    """Builds the fixtures for pickup_date and serves them on a background thread. Returns the server."""
+    build_fixtures(pickup_date)
+    events.clear()
+    server = ThreadingHTTPServer((mock_host, port), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 Mock Vendor Central on http://{mock_host}:{port} ({len(fixtures['shipments'])} shipments, {len(fixtures['invoices'])} invoices)")
+    return server
+
+
+if __name__ == "__main__":
+    date_input = sys.argv[1] if len(sys.argv) > 1 else datetime.now().strftime("%m/%d/%Y")
+    server = start_server(date_input)
+    print(f"Open http://{mock_host}:{mock_port}/kt/vendor/members/afi-shipment-mgr/shippingqueue. Press CTRL+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\n🛑 Mock server stopped.")
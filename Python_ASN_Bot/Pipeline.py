@@ -0,0 +1,191 @@
+"""
+Label preparation -> label printing -> ASN submission in one run.
+
+The shipping queue is scraped once for the pickup date, then every ARN moves through the
+three stages, each with its own worker tabs. An ARN goes on to the next stage as soon as
+it's done with the last one, so a slow ARN only holds up itself; an ARN that fails a stage
+stops there. Results go to the same logs and journals as PrepareLabels, PrintLabels and
+ASNBot, so running one of those bots afterwards skips what the pipeline already did.
+"""
+import asyncio
+import sys
+import warnings
+
+import ASNBot
+import PrepareLabels
+import PrintLabels
+from EtaEngine import precompute_etas
+from EvidenceCapture import finish_evidence, start_evidence
+from QueueScraper import open_queue
+from ResourceBlocker import disable_resource_blocking, enable_resource_blocking, report_blocked
+from RunJournal import done_statuses, journal_path, load_completed, open_journal, record
+from StatusWriter import StatusWriter
+from Tracing import finish_trace, instrument_context, set_tag, start_trace
+
+stages = ("prepare", "print", "asn")
+stage_workers = {"prepare": 2, "print": 1, "asn": 2}  # Tabs per stage
+
+# Bot whose log and journal each stage writes to, and that log's columns
+stage_logs = {
+    "prepare": (PrepareLabels.log_file, ["ARN", "Warehouse", "Link", "# Of Packs", "Status"]),
+    "print": (PrintLabels.log_file, ["ARN", "Link", "Status"]),
+    "asn": (ASNBot.log_file, ["ARN", "Warehouse", "Link", "Status"]),
+}
+
+
+async def prepare_stage(page, arn, value, context):
+    rows = await PrepareLabels.prepare_arn(
+        page, arn, value[2], PrepareLabels.label_mapping_link(arn), context["shipment_index"]
+    )
+    return rows, bool(rows) and rows[-1][-1] in done_statuses
+
+
+async def print_stage(page, arn, value, context):
+    printed = await PrintLabels.click_print_sequence(page, arn)
+    return [[arn, f"{PrintLabels.shipment_detail_base}{arn}", "Printed" if printed else "Failed"]], printed
+
+
+async def asn_stage(page, arn, value, context):
+    row = await ASNBot.submit_arn(page, arn, value, context["date_input"], context["eta_by_wrhs"])
+    return [row], row[-1] == "Submitted"
+
+
+stage_functions = {"prepare": prepare_stage, "print": print_stage, "asn": asn_stage}
+
+
+async def stage_worker(stage, page, inbox, outbox, arn_data, context):
+    """
+    Runs one stage for ARNs off `inbox` on this worker's tab and hands the ones that went
+    through to `outbox`. ARNs a previous run already finished for this stage are passed on as is.
+    """
+    log = context["logs"][stage]
+    while True:
+        arn = await inbox.get()
+        if arn is None:
+            break
+        set_tag(arn)
+
+        if arn in log["completed"]:
+            done = True
+        else:
+            rows, done = await stage_functions[stage](page, arn, arn_data[arn], context)
+            record(log["journal"], context["date_input"], arn, rows)
+            for row in rows:
+                log["writer"].write(row)
+
+        if not done:
+            print(f"⛔ {arn} stopped at the {stage} stage")
+        elif outbox is not None:
+            outbox.put_nowait(arn)
+
+
+async def run_stage(stage, stage_pages, queues, arn_data, context):
+    """Runs the stage's workers until its queue is drained, then tells the next stage to stop."""
+    next_stage = stages[stages.index(stage) + 1] if stage != stages[-1] else None
+    outbox = queues[next_stage] if next_stage else None
+    await asyncio.gather(*[
+        stage_worker(stage, page, queues[stage], outbox, arn_data, context)
+        for page in stage_pages[stage]
+    ])
+    if next_stage:
+        for _ in stage_pages[next_stage]:
+            outbox.put_nowait(None)  # One stop signal per worker
+    print(f"✅ {stage} stage finished")
+
+
+def open_logs(date_input, arn_data):
+    """Opens each stage's journal and status log and writes the rows of ARNs already done."""
+    logs = {}
+    for stage in stages:
+        log_file, columns = stage_logs[stage]
+        completed = {arn: rows for arn, rows in load_completed(log_file, date_input).items() if arn in arn_data}
+        writer = StatusWriter(log_file, columns)
+        for rows in completed.values():
+            for row in rows:
+                writer.write(row)
+        if completed:
+            print(f"⏭️ {stage}: {len(completed)} ARN(s) already done (see {journal_path(log_file)})")
+        logs[stage] = {"journal": open_journal(log_file), "writer": writer, "completed": completed}
+    return logs
+
+
+async def run_pipeline(page, arn_data, date_input, logs):
+    context = {
+        "date_input": date_input,
+        "eta_by_wrhs": ASNBot.extract_excel_data(ASNBot.wrhs_file),
+        "shipment_index": PrepareLabels.load_shipment_index(PrepareLabels.shipment_file),
+        "logs": logs,
+    }
+    precompute_etas([(date_input, context["eta_by_wrhs"].get(value[2])) for value in arn_data.values()])
+
+    # The connected page is the first prepare worker, every other worker gets a new tab
+    counts = {stage: max(1, stage_workers[stage]) for stage in stages}
+    pages = [page]
+    for _ in range(sum(counts.values()) - 1):
+        pages.append(await page.context.new_page())
+    stage_pages = {}
+    for stage in stages:
+        stage_pages[stage], pages = pages[:counts[stage]], pages[counts[stage]:]
+    print(f"🧵 {len(arn_data)} ARN(s) through " + " -> ".join(f"{stage} ({len(stage_pages[stage])} tab(s))" for stage in stages))
+
+    queues = {stage: asyncio.Queue() for stage in stages}
+    for arn in arn_data:
+        queues["prepare"].put_nowait(arn)
+    for _ in stage_pages["prepare"]:
+        queues["prepare"].put_nowait(None)
+
+    try:
+        await asyncio.gather(*[run_stage(stage, stage_pages, queues, arn_data, context) for stage in stages])
+    finally:
+        for worker_page in [p for stage in stages for p in stage_pages[stage]][1:]:
+            await worker_page.close()
+
+
+async def run_script(page=None, date_input=None):
+    """A page passed in by SessionDaemon is used as is and its browser is left open."""
+    warnings.filterwarnings("ignore", category=ResourceWarning)
+    if page:
+        playwright, browser = None, None  # Owned by SessionDaemon
+    else:
+        playwright, browser, page = await ASNBot.connect_browser()
+    if not page:
+        print("❌ No valid page found. Exiting.")
+        return
+    await enable_resource_blocking(page.context)
+    start_trace()
+    start_evidence("Pipeline")
+    instrument_context(page.context)
+
+    logs = {}
+    try:
+        if not date_input:
+            date_input = input("Enter a date (MM/DD/YYYY): ")
+        await open_queue(page, [date_input])
+
+        # One scrape of the queue for all three stages
+        arn_data = await ASNBot.paginate_and_extract(page, ASNBot.format_date(date_input))
+        print(f"\n🔎 Extracted {len(arn_data)} ARNs\n")
+
+        logs = open_logs(date_input, arn_data)
+        await run_pipeline(page, arn_data, date_input, logs)
+
+        for log in logs.values():
+            await log["writer"].close(arn_data.keys())
+        report_blocked()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down gracefully...")
+    finally:
+        for log in logs.values():
+            log["writer"].stop()
+            log["journal"].close()
+        finish_trace("Pipeline")
+        await disable_resource_blocking(page.context)
+        await finish_evidence()
+        if browser:
+            await browser.close()
+        if playwright:
+            await playwright.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_script(date_input=sys.argv[1] if len(sys.argv) > 1 else None))
@@ -7,9 +7,21 @@ from playwright.async_api import async_playwright
 import requests
 import pandas as pd
 
+from EvidenceCapture import finish_evidence, keep_evidence, snapshot, start_evidence, watch_page
+from ExcelCache import load_cached
+from QueueScraper import (
+    extract_rows, next_page, open_queue, report_page_waits, save_queue_snapshot, start_queue_snapshot,
+)
+from ResourceBlocker import disable_resource_blocking, enable_resource_blocking, report_blocked
+from RetryQueue import RetryQueue, retry_status
+from RunJournal import done_statuses, journal_path, load_completed, open_journal, record
+from StatusWriter import StatusWriter
+from Tracing import finish_trace, instrument_context, set_tag, start_trace, traced, traced_sleep
+
 target_site = "https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue?openid.assoc_handle=amzn_vc_us_v2&openid.claimed_id=https%3A%2F%2Fvendorcentral.amazon.com%2Fap%2Fid%2Famzn1.account.AERNEUPQAXWSM2DTBSEAINFHCFUA&openid.identity=https%3A%2F%2Fvendorcentral.amazon.com%2Fap%2Fid%2Famzn1.account.AERNEUPQAXWSM2DTBSEAINFHCFUA&openid.mode=id_res&openid.ns=http%3A%2F%2Fspecs.openid.net%2Fauth%2F2.0&openid.op_endpoint=https%3A%2F%2Fvendorcentral.amazon.com%2Fap%2Fsignin&openid.response_nonce=2025-03-14T22%3A56%3A06Z3064750971631980168&openid.return_to=https%3A%2F%2Fvendorcentral.amazon.com%2Fkt%2Fvendor%2Fmembers%2Fafi-shipment-mgr%2Fshippingqueue&openid.signed=assoc_handle%2Cclaimed_id%2Cidentity%2Cmode%2Cns%2Cop_endpoint%2Cresponse_nonce%2Creturn_to%2Cns.pape%2Cpape.auth_policies%2Cpape.auth_time%2Csigned&openid.ns.pape=http%3A%2F%2Fspecs.openid.net%2Fextensions%2Fpape%2F1.0&openid.pape.auth_policies=SinglefactorWithPossessionChallenge&openid.pape.auth_time=2025-03-14T22%3A55%3A39Z&openid.sig=c8PoFmf9ENHIP6yMONolJjf1GrheveoIWNyJJPz%2Fb68%3D&serial="
 shipment_file = "../shipment_details.xlsx"
 log_file = "./Label_Prep_Status.xlsx"
+bulk_fill_cartons = True  # Fill every carton input in one call, False = type into each input like before
 
 def format_date(user_input):
     """
@@ -31,7 +43,56 @@ def format_date(user_input):
         return "❌ Invalid date format. Please enter date as MM/DD/YYYY."
 
 def findNumCartons(pack, master):
-    print()
+    """
+    Returns (units per carton, cartons) for a pack count and the sheet's master pack.
+    Less than a master pack ships as single units; an indivisible pack returns (0, 0).
+    """
+    if pack < master:
+        return 1, pack
+    if pack % master != 0:
+        print("INDIVISIBLE PACK")
+        return 0, 0
+    return master, pack // master
+
+def build_shipment_index(file_path):
+    """
+    Builds a (ASIN, Warehouse) -> PO / master pack table from shipment_details.xlsx.
+    Warehouse is the first word of column A ('Default' when empty); later rows win on duplicates.
+    """
+    shipment_data = pd.read_excel(
+        file_path,
+        skiprows=7, 
+        usecols="A,C,D,M", 
+        header=None, 
+        names=["Wrhs", "ASIN", "PO", "Pack"]
+    )
+    shipment_index = pd.DataFrame({
+        "ASIN": shipment_data["ASIN"].astype(str).str.strip(),
+        "Wrhs": shipment_data["Wrhs"].astype(str).str.split().str[0].where(shipment_data["Wrhs"].notna(), "Default"),
+        "PO": shipment_data["PO"].astype(str).str.strip(),
+        "Pack": pd.to_numeric(shipment_data["Pack"], errors="coerce"),
+    })
+    return (
+        shipment_index
+        .drop_duplicates(["ASIN", "Wrhs"], keep="last")
+        .set_index(["ASIN", "Wrhs"])
+        .sort_index()
+    )
+
+def load_shipment_index(file_path):
+    """The shipment index, read from the binary cache unless shipment_details.xlsx changed."""
+    return load_cached(file_path, "index", build_shipment_index)
+
+def join_pack_info(shipment_index, all_pack_info, wrhs):
+    """
+    Looks up every [ASIN, pack, PO] from extract_pack_info in the shipment index at once.
+    Returns [ASIN, pack, PO, sheet PO, master pack] rows, with None where the sheet has no match.
+    """
+    packs = pd.DataFrame(all_pack_info, columns=["ASIN", "Pack", "PO"])
+    packs["Wrhs"] = wrhs
+    joined = packs.join(shipment_index, on=["ASIN", "Wrhs"], rsuffix="_sheet")
+    joined = joined[["ASIN", "Pack", "PO", "PO_sheet", "Pack_sheet"]].astype(object)
+    return joined.where(joined.notna(), None).values.tolist()
 
 # Don't ask how this function works it just does
 async def connect_browser():
@@ -86,13 +147,15 @@ async def connect_browser():
         print(f"❌ Unexpected error: {e}")
         return None, None, None
 
+def label_mapping_link(arn):
+    return f"https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/labelmapping?arn={arn}&isLegacy=false"
+
 async def extract_pg_data(page, formatted_date_input):
     """
-    Extract all elements with class 'kat-label.kat-label-light-text'.
+    Reads every row on the page in one call (see QueueScraper.extract_rows).
     This finds all ARN's and their links
     """
-    await page.wait_for_selector("div.rdt_TableRow", state="attached", timeout=20000)
-    table_rows = await page.query_selector_all("div.rdt_TableRow")
+    table_rows = await extract_rows(page)
 
     if not table_rows:
         print("❌ No table rows found. The page structure may have changed or elements are not loading.")
@@ -103,18 +166,15 @@ async def extract_pg_data(page, formatted_date_input):
     table_data = {}
 
     for row in table_rows:
-        # Extract ARN & Link
-        arn_link_element = await row.query_selector("kat-link[id^='sq-table-arn-link']")
-        arn = await arn_link_element.get_attribute("label") if arn_link_element else None
-        arn_link = f"https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/labelmapping?arn={arn}&isLegacy=false"
+        # ARN & Link
+        arn = row["arn"]
+        arn_link = label_mapping_link(arn)
 
-        # Extract Pickup Date
-        pickup_element = await row.query_selector("kat-label[id^='sq-table-date-']")
-        pickup_date = await pickup_element.get_attribute("text") if pickup_element else None
+        # Pickup Date
+        pickup_date = row["date"]
 
-        # Extract Ship From & Ship To Location
-        ship_from_to_elements = await row.query_selector_all("kat-label[id^='sq-table-st']")
-        ship_location = " | ".join([await loc.get_attribute("text") for loc in ship_from_to_elements]) if ship_from_to_elements else None
+        # Ship From & Ship To Location
+        ship_location = row["ship"]
 
         if arn and pickup_date:
             if formatted_date_input in pickup_date:
@@ -130,11 +190,14 @@ async def extract_pg_data(page, formatted_date_input):
 
     return table_data
 
+@traced
 async def paginate_and_extract(page, formatted_date_input):
     """
     Extract ARN's using function above and click the 'Next' button until no more pages exist.
     """
     table_data = {}
+    page_waits = []
+    await start_queue_snapshot(page, formatted_date_input)
 
     while True:
         try:
@@ -144,8 +207,8 @@ async def paginate_and_extract(page, formatted_date_input):
             next_button = await page.query_selector("div#sq-pag-next-div")
             if (next_button and len(new_data) > 0):
                 print("➡️ Next page found! Clicking 'Next'...")
-                await next_button.click()
-                await asyncio.sleep(3)  # Wait for the next page to load
+                if not await next_page(page, next_button, page_waits):  # Waits for the next page to load
+                    break
             else:
                 print("No more pages with required pickup date...\n")
                 break
@@ -153,8 +216,11 @@ async def paginate_and_extract(page, formatted_date_input):
             print("No data was found on this page...\n\n")
             break        
     
+    save_queue_snapshot(page)
+    report_page_waits(page_waits, page)
     return table_data
 
+@traced
 async def cont_to_step(page, step_num):
     await page.wait_for_selector(f"kat-button[label='Continue to step {step_num}']", timeout=5000)
     button = await page.query_selector(f"kat-button[label='Continue to step {step_num}']")
@@ -164,55 +230,252 @@ async def cont_to_step(page, step_num):
     except:
         print(f"Error: Cannot press step {step_num} button")
 
+# Sets each kat-input's inner <input> and fires the events the form listens for.
+# Takes [[kat-input index, value], ...] and returns the indexes it couldn't find.
+FILL_KAT_INPUTS_JS = """
+(entries) => {
+    const katInputs = document.querySelectorAll('kat-input');
+    const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    const missing = [];
+    for (const [index, value] of entries) {
+        const input = katInputs[index]?.shadowRoot?.querySelector('input');
+        if (!input) {
+            missing.push(index);
+            continue;
+        }
+        setValue.call(input, String(value));
+        input.dispatchEvent(new Event('input', {bubbles: true, composed: true}));
+        input.dispatchEvent(new Event('change', {bubbles: true, composed: true}));
+    }
+    return missing;
+}
+"""
+
+READ_KAT_INPUTS_JS = """
+(indexes) => {
+    const katInputs = document.querySelectorAll('kat-input');
+    return indexes.map(index => katInputs[index]?.shadowRoot?.querySelector('input')?.value ?? null);
+}
+"""
+
+async def type_into_kat_input(page, index, value):
+    """Clears the index-th kat-input and types the value one key at a time."""
+    kat_input = await page.evaluate_handle("""
+    (index) => {
+        const katInput = document.querySelectorAll('kat-input')[index];
+        return katInput?.shadowRoot?.querySelector('input');
+    }
+    """, index)
+    if not kat_input.as_element():
+        return False
+    await kat_input.evaluate("el => el.value = ''")
+    await kat_input.type(str(value), delay=50)
+    return True
+
+@traced
+async def fill_carton_inputs(page, entries):
+    """
+    Fills every [kat-input index, value] pair in one call and reads them all back in one more.
+    Any input whose value didn't stick is typed into the old way.
+    """
+    if not entries:
+        return
+    last_index = max(index for index, _ in entries)
+    await page.wait_for_function(f"() => document.querySelectorAll('kat-input').length > {last_index}", timeout=15000)
+
+    if bulk_fill_cartons:
+        await page.evaluate(FILL_KAT_INPUTS_JS, entries)
+        values = await page.evaluate(READ_KAT_INPUTS_JS, [index for index, _ in entries])
+        retype = [[index, value] for (index, value), found in zip(entries, values) if found != str(value)]
+        print(f"✅ Filled {len(entries) - len(retype)}/{len(entries)} carton inputs in one pass")
+    else:
+        retype = entries
+
+    for index, value in retype:
+        if not await type_into_kat_input(page, index, value):
+            print(f"❌ Could not find carton input {index}")
+
+# Every SKU row of the packing table in one call. The pack cell ("packed / total") is
+# every 6th table cell starting at the 11th; if that cell isn't one, the row's own cells are searched.
+PACK_TABLE_JS = """
+() => {
+    const cells = Array.from(document.querySelectorAll('div.rdt_TableCell'));
+    const between = (text, start, end) => {
+        const after = text.split(start)[1];
+        return after === undefined ? null : after.split(end)[0].trim();
+    };
+    const isPackCell = cell => cell && /\\d+\\s*\\/\\s*\\d+/.test(cell.innerText);
+    return Array.from(document.querySelectorAll('div.sb-asinRow-detail-div'), (detail, i) => {
+        let packCell = cells[10 + 6 * i];
+        if (!isPackCell(packCell)) {
+            const row = detail.closest('.rdt_TableRow');
+            packCell = row ? Array.from(row.querySelectorAll('div.rdt_TableCell')).find(isPackCell) : null;
+        }
+        const text = detail.innerText;
+        const pack = packCell ? parseInt(packCell.innerText.split('/')[1].replace(/,/g, ''), 10) : NaN;
+        return {
+            asin: between(text, 'ASIN:', 'Model:'),
+            pack: Number.isNaN(pack) ? null : pack,  // "1,200" -> 1200, unreadable -> null
+            po: between(text, 'Purchase order:', 'ASIN:'),
+        };
+    });
+}
+"""
+
+@traced
 async def extract_pack_info(page):
-
+    """
+    Returns [ASIN, pack quantity (int), PO] for every SKU on the packing step, read in one call.
+    Raises ValueError if any row can't be read: prepare_arn places each SKU's carton inputs
+    by its row position, so skipping a row would shift every later SKU into the wrong inputs.
+    """
     total_packs = []
-    elements = await page.query_selector_all("div.rdt_TableCell")
-    asin_elements = await page.query_selector_all("div.sb-asinRow-detail-div")
-
-    pack_i = 10
+    for i, row in enumerate(await page.evaluate(PACK_TABLE_JS)):
+        if row["pack"] is None or not row["asin"] or row["po"] is None:
+            raise ValueError(f"Couldn't read the ASIN, pack or PO of SKU row {i + 1}: {row}")
+        print(row["asin"], row["pack"], row["po"])
+        total_packs.append([row["asin"], row["pack"], row["po"]])
+    return total_packs
 
-    for i in range(len(asin_elements)):
-        if pack_i >= len(elements):
-            print(f"⚠️ Skipping pack_i={pack_i}, only {len(elements)} cells found")
-            break
+@traced
+async def prepare_arn(page, arn, wrhs, link, shipment_index, retries=None):
+    """
+    Fills in the pack information for one ARN on its labelmapping page and confirms the labels.
+    Returns the ARN's log rows ([ARN, Warehouse, Link, # Of Packs, Status]).
+    With a RetryQueue, an ARN that failed on a retryable error before anything was confirmed
+    is put back and gets a single row with the retry_status instead.
+    """
+    log_rows = []
+    error = None
+    watch_page(page, arn)
+    try:
+        await traced_sleep(1)
+        await page.goto(link)  # Navigate to the link
+        print("\n_________________________________\n", wrhs)
+        await cont_to_step(page, 2)
+        # Extract the info from the cell after moving to step 2
+    except Exception as e:
+        print("error lolz", e)
+        error = e
+        log_rows.append([arn, wrhs, link, 0, "Error"])
+    all_pack_info = []
+    try:
+        await page.wait_for_selector("input[name='packingMethod']", timeout=5000)
+        radio_buttons = await page.query_selector_all("input[name='packingMethod']")
+        if radio_buttons and len(radio_buttons) > 0:
+            await radio_buttons[0].click(force=True)
         
-        packs = await elements[pack_i].inner_text()
-        asin = await asin_elements[i].inner_text()
-        print(asin)
-        print(asin.split("ASIN:")[1].split("Model:")[0].strip(), packs.split("/")[1].strip(), asin.split("Purchase order:")[1].split("ASIN:")[0].strip())
-        total_packs.append([asin.split("ASIN:")[1].split("Model:")[0].strip(), packs.split("/")[1].strip(), asin.split("Purchase order:")[1].split("ASIN:")[0].strip()])
-        pack_i += 6
-    return total_packs
+        all_pack_info = await extract_pack_info(page)
+
+        """ FILL OUT PACK INFORMATION HERE TO CONFIRM THE LABEL"""
+        kat_index = 2
+        carton_entries = []  # [kat-input index, value] for every Units Per Carton / Cartons input
+
+        for asn, pack, po, sheet_po, sheet_pack in join_pack_info(shipment_index, all_pack_info, wrhs):
+            print(f"VENDORCENTRAL ___ ASN: {asn}       Pack: {pack}    PO:{po}")
+            if sheet_pack is None:
+                raise KeyError(f"{asn}::{wrhs} not found in {shipment_file}")
+
+            unit, cartons = findNumCartons(int(pack), int(sheet_pack))
+
+            if (sheet_po == po):
+                print(f"SHEET         ___ ASN: {asn} Master Pack: {sheet_pack}   PO{sheet_po}")
+                print(f"UnitPerCartons: {unit}          Cartons: {cartons}")
+                carton_entries.append([kat_index, unit])
+                carton_entries.append([kat_index + 1, cartons])
+            else:
+                print(f"SHEET         NOT FOUND... ASN: {asn}, PO: {po}, S_PO: {sheet_po}")
+
+            kat_index += 3
+
+        await fill_carton_inputs(page, carton_entries)
+        try:
+            print("submitting...")
+            await snapshot(page, "before confirm")
+            
+            conf_button = await page.query_selector('kat-button[label="Confirm all SKUs"]')
+            await conf_button.click(force=True)
+
+            new_conf_button = await page.query_selector('kat-button[label="Confirm and print labels"]')
+            await new_conf_button.click(force=True)
+
+
+            log_rows.append([arn, wrhs, link, len(all_pack_info), "Complete"])
+            await traced_sleep(2)  # Wait to allow submission process
 
-async def run_script():
+        except Exception as e:
+            try:
+                await page.click('kat-button >> text="Confirm all SKUs"')
+                await page.click('kat-button >> text="Confirm and print labels"')
+                log_rows.append([arn, wrhs, link, len(all_pack_info), "Shadow Button Clicked"])
+                print("Submit button clicked")
+            except Exception as ex:
+                log_rows.append([arn, wrhs, link, len(all_pack_info), "Submit not clicked"])
+                print("Couldn't Find a Submit Button", e)
+
+        if(len(all_pack_info) <= 0):
+            log_rows.append([arn, wrhs, link, len(all_pack_info), "Already Completed"])
+            
+    except Exception as e:
+        error = error or e
+        log_rows.append([arn, wrhs, link, len(all_pack_info), "Err"])
+        print(f"Couldn't find radio button input\n{e}")
+
+    if error and retries and not any(row[-1] in done_statuses for row in log_rows):
+        if retries.schedule(arn, (wrhs, link), error):
+            log_rows = [[arn, wrhs, link, len(all_pack_info), retry_status]]
+    failed = not any(row[-1] in done_statuses for row in log_rows)
+    await keep_evidence(page, arn, log_rows[-1][-1], failed)
+    return log_rows
+
+async def run_script(page=None, date_input=None):
     
-    """Runs the script and ensures proper cleanup."""
+    """
+    Runs the script and ensures proper cleanup.
+    When SessionDaemon passes in a page the browser connection is left open afterwards.
+    """
     warnings.filterwarnings("ignore", category=ResourceWarning)  # Suppress asyncio resource warnings
 
-    playwright, browser, page = await connect_browser()
+    if page:
+        playwright, browser = None, None  # Owned by SessionDaemon
+    else:
+        playwright, browser, page = await connect_browser()
     if not page:
         print("❌ No valid page found. Exiting.")
         return
 
     print("✅ Playwright is running. Press CTRL+C to stop.")
+    await enable_resource_blocking(page.context)  # Context wide so worker tabs are covered too
+    start_trace()
+    start_evidence("PrepareLabels")
+    instrument_context(page.context)
     
+    journal = open_journal(log_file)
+    writer = StatusWriter(log_file, ["ARN", "Warehouse", "Link", "# Of Packs", "Status"])
     try:
         #######################################################################################
         ############################### ALL MAIN CODE RAN BELOW ###############################
         #######################################################################################
-        # Navigate to below page before anything:
-        await page.goto("https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue")
-        await asyncio.sleep(2)
-
         """Get Pickup Date"""
-        date_input = input("Enter a date (MM/DD/YYYY): ")
+        if not date_input:
+            date_input = input("Enter a date (MM/DD/YYYY): ")
         formatted_date_input = format_date(date_input)
 
+        # Navigate to the shipping queue, filtered to the pickup date where the queue allows it
+        await open_queue(page, [date_input])
+
         """Find All Products and Store in a Dictionary"""        
         arn_data = await paginate_and_extract(page, formatted_date_input)
         print(f"\n🔎 Extracted {len(arn_data)} ARNs: {arn_data}\n")
 
+        """Skip ARNs A Previous Run Already Prepared"""
+        completed = load_completed(log_file, date_input)
+        if completed.keys() & arn_data.keys():
+            print(f"⏭️ Skipping {len(completed.keys() & arn_data.keys())} ARN(s) already prepared (see {journal_path(log_file)})")
+            for arn in completed.keys() & arn_data.keys():
+                for row in completed[arn]:
+                    writer.write(row)
+
         """Store in array and sort by warehouse"""
         arn_list = [
             [arn, data[1], data[2]]
@@ -220,144 +483,28 @@ async def run_script():
         ]
         arn_list = sorted(arn_list,key=lambda l:l[1])
 
-        log_data = []
-        shipment_data = pd.read_excel(
-            shipment_file,
-            skiprows=7, 
-            usecols="A,C,D,M", 
-            header=None, 
-            names=["Wrhs", "ASIN", "PO", "Pack"]
-        )
-        print(shipment_data.head())
-        shipment_dict = {
-        f"{row['ASIN']}::{(row['Wrhs']).split()[0] if str(row['Wrhs']) != 'nan' else 'Default'}": {'PO': row['PO'], 'Pack': row['Pack']}
-            for _, row in shipment_data.iterrows()
-        }
+        shipment_index = load_shipment_index(shipment_file)
+        print(f"✅ Loaded {len(shipment_index)} ASIN/warehouse rows from {shipment_file}")
  
         """Perform actions"""
-        print(shipment_dict.keys())
-        for arn, wrhs, link in arn_list:
-            try:
-                await asyncio.sleep(1)
-                await page.goto(link)  # Navigate to the link
-                print("\n_________________________________\n", wrhs)
-                await cont_to_step(page, 2)
-                # Extract the info from the cell after moving to step 2
-            except Exception as e:
-                print("error lolz", e)
-                log_data.append([arn, wrhs, link, 0, "Error"])
-            all_pack_info = []
-            try:
-                await page.wait_for_selector("input[name='packingMethod']", timeout=5000)
-                radio_buttons = await page.query_selector_all("input[name='packingMethod']")
-                if radio_buttons and len(radio_buttons) > 0:
-                    await radio_buttons[0].click(force=True)
-                
-                all_pack_info = await extract_pack_info(page)
-
-                """ FILL OUT PACK INFORMATION HERE TO CONFIRM THE LABEL"""
-                kat_index = 2
-                confirm_index = 1
-                
-                for asn, pack, po in all_pack_info:
-                    dict_key = f"{asn}::{wrhs}"
-                    print(f"VENDORCENTRAL ___ ASN: {asn}       Pack: {pack}    PO:{po}")
-
-                    masterpack = int(shipment_dict.get(dict_key)['Pack'])
-                    pack = int(pack)
-                    unit = 0
-                    cartons = 0
-                    if (pack < masterpack):
-                        unit = 1
-                        cartons = pack
-                    elif (pack % masterpack != 0):
-                        print("INDIVISIBLE PACK")
-                    else:
-                        unit = masterpack
-                        cartons = pack/masterpack
-
-                    if (shipment_dict.get(dict_key)['PO'] == po):
-                        print(f"SHEET         ___ ASN: {asn} Master Pack: {shipment_dict.get(dict_key)['Pack']}   PO{shipment_dict.get(dict_key)['PO']}")
-                        print(f"UnitPerCartons: {unit}          Cartons: {cartons}")
-                        # Wait for at least 2 kat-inputs to be present in the DOM
-                        await page.wait_for_function(
-                            "() => document.querySelectorAll('kat-input').length >= 2",
-                            timeout=15000
-                        )
-                        # Wait until kat-inputs are available
-                        await page.wait_for_function("() => document.querySelectorAll('kat-input').length >= 2", timeout=10000)
-
-                        # Typing into Units Per Carton
-                        unit_input = await page.evaluate_handle("""
-                        (index) => {
-                            const katInput = document.querySelectorAll('kat-input')[index];
-                            return katInput?.shadowRoot?.querySelector('input');
-                        }
-                        """, kat_index)
-
-                        if unit_input:
-                            await unit_input.evaluate("el => el.value = ''")
-                            await unit_input.type(str(unit), delay=50)
-                        else:
-                            print("❌ Could not find Units Per Carton input field")
-
-                        # Typing into Cartons
-                        carton_input = await page.evaluate_handle("""
-                        (index) => {
-                            const katInput = document.querySelectorAll('kat-input')[index];
-                            return katInput?.shadowRoot?.querySelector('input');
-                        }
-                        """, kat_index + 1)
-
-                        if carton_input:
-                            await carton_input.evaluate("el => el.value = ''")
-                            await carton_input.type(str(cartons), delay=50)
-                        else:
-                            print("❌ Could not find Cartons input field")
-
-
-                    else:
-                        print(f"SHEET         NOT FOUND... ASN: {asn}, PO: {po}, S_PO: {shipment_dict.get(dict_key)['PO']}")
-                    print(kat_index)
-    #                await conf_buttons[confirm_index].click(force=True)
-
-                    kat_index += 3
-                    confirm_index += 1
-                try:
-                    print("submitting...")
-                    await page.screenshot(path=f"screenshot_{arn}.png")
-                    
-                    conf_button = await page.query_selector('kat-button[label="Confirm all SKUs"]')
-                    await conf_button.click(force=True)
-
-                    new_conf_button = await page.query_selector('kat-button[label="Confirm and print labels"]')
-                    await new_conf_button.click(force=True)
-
-
-                    log_data.append([arn, wrhs, link, len(all_pack_info), "Complete"])
-                    await asyncio.sleep(2)  # Wait to allow submission process
-
-                except Exception as e:
-                    try:
-                        await page.click('kat-button >> text="Confirm all SKUs"')
-                        await page.click('kat-button >> text="Confirm and print labels"')
-                        log_data.append([arn, wrhs, link, len(all_pack_info), "Shadow Button Clicked"])
-                        print("Submit button clicked")
-                    except Exception as ex:
-                        log_data.append([arn, wrhs, link, len(all_pack_info), "Submit not clicked"])
-                        print("Couldn't Find a Submit Button", e)
-
-                if(len(all_pack_info) <= 0):
-                    log_data.append([arn, wrhs, link, len(all_pack_info), "Already Completed"])
-                    
-            except Exception as e:
-                log_data.append([arn, wrhs, link, len(all_pack_info), "Err"])
-                print(f"Couldn't find radio button input\n{e}")
-
-        """ Save DataFrame to Excel """
-        df = pd.DataFrame(log_data, columns=["ARN", "Warehouse", "Link", "# Of Packs", "Status"])
-        df.to_excel(log_file, index=False, engine="openpyxl")
-        print(f"✅ Log saved to {log_file}")
+        retries = RetryQueue("label preparation(s)")
+        todo = [[arn, wrhs, link] for arn, wrhs, link in arn_list if arn not in completed]
+        while todo:
+            for arn, wrhs, link in todo:
+                set_tag(arn)
+                log_rows = await prepare_arn(page, arn, wrhs, link, shipment_index, retries)
+                if log_rows[-1][-1] == retry_status:
+                    continue  # Logged when it's retried
+                record(journal, date_input, arn, log_rows)
+                for row in log_rows:
+                    writer.write(row)
+            # Timed out ARNs, once their backoff is over
+            todo = [[arn, wrhs, link] for arn, (wrhs, link) in (await retries.due()).items()]
+        retries.report()
+
+        """ Save the streamed rows to Excel """
+        await writer.close([arn for arn, _, _ in arn_list])
+        report_blocked()
 
         #######################################################################################
         ############################### ALL MAIN CODE RAN ABOVE ###############################
@@ -368,6 +515,11 @@ async def run_script():
     except KeyboardInterrupt:
         print("\n🛑 Shutting down gracefully...")
     finally:
+        writer.stop()
+        journal.close()
+        finish_trace("PrepareLabels")
+        await disable_resource_blocking(page.context)
+        await finish_evidence()
         if browser:
             await browser.close()
         if playwright:
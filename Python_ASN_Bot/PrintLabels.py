@@ -3,7 +3,14 @@ import warnings
 from datetime import datetime
 from playwright.async_api import async_playwright
 import requests
-import pandas as pd
+
+from QueueScraper import (
+    extract_rows, next_page, open_queue, report_page_waits, save_queue_snapshot, start_queue_snapshot,
+)
+from ResourceBlocker import disable_resource_blocking, enable_resource_blocking, report_blocked
+from RunJournal import journal_path, load_completed, open_journal, record
+from StatusWriter import StatusWriter
+from Tracing import finish_trace, instrument_context, set_tag, start_trace, traced
 
 # URLs
 target_site = "https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue"
@@ -54,49 +61,45 @@ async def connect_browser():
 
 async def extract_pg_data(page, formatted_date_input):
     """Extract ARNs from current page based on the pickup date."""
-    await page.wait_for_selector("div.rdt_TableRow", state="attached", timeout=20000)
-    rows = await page.query_selector_all("div.rdt_TableRow")
+    rows = await extract_rows(page)
     table_data = {}
 
     for row in rows:
-        try:
-            arn_el = await row.query_selector("kat-link[id^='sq-table-arn-link']")
-            arn = await arn_el.get_attribute("label") if arn_el else None
-
-            pickup_el = await row.query_selector("kat-label[id^='sq-table-sl2']")
-            pickup_date = await pickup_el.get_attribute("text") if pickup_el else None
-
-            if arn and pickup_date and formatted_date_input in pickup_date:
-                table_data[arn] = pickup_date
-                print(f"📦 Found ARN {arn} ({pickup_date})")
+        arn = row["arn"]
+        pickup_date = row["sl2"]
 
-        except Exception as e:
-            print(f"⚠️ Skipping row due to error: {e}")
+        if arn and pickup_date and formatted_date_input in pickup_date:
+            table_data[arn] = pickup_date
+            print(f"📦 Found ARN {arn} ({pickup_date})")
 
     return table_data
 
 
+@traced
 async def paginate_and_extract(page, formatted_date_input):
     """Go through all pages and collect ARNs for the date."""
     all_arns = {}
+    page_waits = []
     page_num = 1
+    await start_queue_snapshot(page, formatted_date_input)
     while True:
         print(f"\n📄 Extracting ARNs from page {page_num}...")
         new_data = await extract_pg_data(page, formatted_date_input)
         all_arns.update(new_data)
 
         next_button = await page.query_selector("div#sq-pag-next-div")
-        if next_button and new_data:
-            await next_button.click()
-            await asyncio.sleep(3)
+        if next_button and new_data and await next_page(page, next_button, page_waits):
             page_num += 1
         else:
             break
 
+    save_queue_snapshot(page)
+    report_page_waits(page_waits, page)
     print(f"\n✅ Total ARNs found: {len(all_arns)}")
     return all_arns
 
 
+@traced
 async def click_print_sequence(page, arn):
     """
     Visit shipment detail page and:
@@ -126,39 +129,63 @@ async def click_print_sequence(page, arn):
 
 
 
-async def run_script():
+async def run_script(page=None, date_input=None):
+    """A page passed in by SessionDaemon is used as is and its browser is left open."""
     warnings.filterwarnings("ignore", category=ResourceWarning)
-    playwright, browser, page = await connect_browser()
+    if page:
+        playwright, browser = None, None  # Owned by SessionDaemon
+    else:
+        playwright, browser, page = await connect_browser()
     if not page:
         return
+    await enable_resource_blocking(page.context)
+    start_trace()
+    instrument_context(page.context)
 
+    journal = open_journal(log_file)
+    writer = StatusWriter(log_file, ["ARN", "Link", "Status"])
     try:
-        await page.goto(target_site)
-        await asyncio.sleep(2)
-
-        date_input = input("Enter pickup date (MM/DD/YYYY): ").strip()
+        if not date_input:
+            date_input = input("Enter pickup date (MM/DD/YYYY): ")
+        date_input = date_input.strip()
         formatted_date = format_date(date_input)
         if not formatted_date:
             print("❌ Invalid date format.")
             return
+        await open_queue(page, [date_input])
 
         # Step 1: Extract ARNs
         arn_data = await paginate_and_extract(page, formatted_date)
 
+        # Skip ARNs a previous run already printed
+        completed = load_completed(log_file, date_input)
+        if completed.keys() & arn_data.keys():
+            print(f"⏭️ Skipping {len(completed.keys() & arn_data.keys())} ARN(s) already printed (see {journal_path(log_file)})")
+            for arn in completed.keys() & arn_data.keys():
+                for row in completed[arn]:
+                    writer.write(row)
+
         # Step 2: Process each ARN
-        log = []
         for arn in arn_data.keys():
+            if arn in completed:
+                continue
+            set_tag(arn)
             success = await click_print_sequence(page, arn)
-            log.append([arn, f"{shipment_detail_base}{arn}", "Printed" if success else "Failed"])
+            row = [arn, f"{shipment_detail_base}{arn}", "Printed" if success else "Failed"]
+            record(journal, date_input, arn, [row])
+            writer.write(row)
 
         # Step 3: Save results
-        df = pd.DataFrame(log, columns=["ARN", "Link", "Status"])
-        df.to_excel(log_file, index=False, engine="openpyxl")
-        print(f"✅ Log saved to {log_file}")
+        await writer.close(arn_data.keys())
+        report_blocked()
 
     except KeyboardInterrupt:
         print("\n🛑 Script manually stopped.")
     finally:
+        writer.stop()
+        journal.close()
+        finish_trace("PrintLabels")
+        await disable_resource_blocking(page.context)
         if browser:
             await browser.close()
         if playwright:
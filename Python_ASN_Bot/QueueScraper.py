@@ -0,0 +1,518 @@
+"""
+Shipping queue helpers shared by ASNBot, PrepareLabels and PrintLabels.
+
+Every bot reads the same `div.rdt_TableRow` rows, so the row scraping lives here and
+each bot only turns the rows into its own dictionary.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+queue_url = "https://vendorcentral.amazon.com/kt/vendor/members/afi-shipment-mgr/shippingqueue"
+fixed_page_sleep = 3  # Seconds the bots used to sleep after every 'Next' click
+
+# The queue's own filter, sort and page size controls as URL parameters. Set the names to what
+# the address bar shows after using the controls on the queue; None leaves a parameter out.
+# Whatever the queue does with them is checked on the first page before it's relied on.
+use_queue_filters = True
+queue_params = {
+    "pickup_from": "pickupDateFrom",
+    "pickup_to": "pickupDateTo",
+    "sort": "sort",
+    "page_size": "pageSize",
+    "page": "page",  # 1-based, used to jump straight to the first page of the pickup dates
+}
+queue_sort = "pickupDate:asc"
+queue_page_size = 100  # Largest page the queue offers
+queue_param_date_format = "%Y-%m-%d"
+empty_queue_timeout = 5000  # ms to wait for rows before treating a filtered page as empty
+
+# Where the rows come from: "dom" reads the rendered table, "network" reads the JSON
+# responses the table is rendered from (falls back to "dom" when no payload is seen)
+queue_source = "dom"
+queue_api_hint = "afi-shipment-mgr"  # Only xhr/fetch responses with this in the URL are parsed
+first_payload_timeout = 5  # Seconds to wait for the first payload before reading the table
+
+# Field names looked up (case-insensitive) in the shipping queue payload
+ARN_KEYS = ("arn", "asnRequestNumber", "amazonReferenceNumber", "referenceNumber")
+ASN_ID_KEYS = ("asnId", "asn", "shipmentId")
+PICKUP_KEYS = ("pickupDate", "scheduledPickupDate", "pickupWindowStart", "pickup")
+SHIP_TO_KEYS = ("shipTo", "shipToLocation", "destinationFc", "fulfillmentCenter", "warehouse", "warehouseId")
+
+# Pages walked for a pickup date are saved and replayed by the next run for that date,
+# as long as the snapshot is younger than snapshot_ttl and its first page matches the live one
+use_queue_snapshots = True
+snapshot_file = "./queue_snapshots.json"
+snapshot_ttl = 10 * 60  # Seconds
+
+queue_listeners = {}  # page -> QueueResponseListener
+queue_snapshots = {}  # page -> QueueSnapshot being replayed or recorded
+queue_reads = {}  # page -> how the queue was opened: mode, pages read and skipped to get there
+
+# ARN of the first row, used to tell when the table has been replaced after 'Next'
+FIRST_ARN_JS = """
+() => {
+    const link = document.querySelector("div.rdt_TableRow kat-link[id^='sq-table-arn-link']");
+    return link ? link.getAttribute("label") : null;
+}
+"""
+
+# Reads every row of the shipping queue table in one call and returns plain JSON
+ROWS_JS = """
+() => Array.from(document.querySelectorAll("div.rdt_TableRow")).map((row) => {
+    const text = (el) => (el ? el.getAttribute("text") : null);
+    const link = row.querySelector("kat-link[id^='sq-table-arn-link']");
+    const shipLabels = Array.from(row.querySelectorAll("kat-label[id^='sq-table-st']"));
+    return {
+        arn: link ? link.getAttribute("label") : null,
+        href: link ? link.getAttribute("href") : null,
+        pickup: text(row.querySelector("kat-label[id^='sq-table-sl2'][text^='Pickup:']")),
+        sl2: text(row.querySelector("kat-label[id^='sq-table-sl2']")),
+        date: text(row.querySelector("kat-label[id^='sq-table-date-']")),
+        ship: shipLabels.length ? shipLabels.map(text).join(" | ") : null,
+    };
+})
+"""
+
+def _lookup(record, keys):
+    """Returns the first non-empty value in record for any of keys (case-insensitive)."""
+    lowered = {str(k).lower(): v for k, v in record.items()}
+    for key in keys:
+        value = lowered.get(key.lower())
+        if isinstance(value, dict):
+            value = _lookup(value, ("code", "id", "name", "value"))
+        if value not in (None, ""):
+            return value
+    return None
+
+def _format_payload_date(value):
+    """Turns an epoch (s or ms) or ISO date from the payload into 'Mon D, YYYY' like the table."""
+    try:
+        if isinstance(value, (int, float)):
+            dt = datetime.fromtimestamp(value / 1000 if value > 1e11 else value, tz=timezone.utc)
+        else:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        return str(value)
+    return f"{dt.strftime('%b')} {dt.day}, {dt.year}"
+
+def _payload_records(payload):
+    """Yields every list of dicts in the payload that has an ARN field."""
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) for item in payload) and _lookup(payload[0], ARN_KEYS):
+            yield payload
+            return
+        for item in payload:
+            yield from _payload_records(item)
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            yield from _payload_records(value)
+
+def parse_queue_payload(payload):
+    """
+    Turns a shipping queue JSON payload into the same row dicts extract_rows returns.
+    Returns [] when the payload has no shipment records or a record is missing a field the bots need.
+    """
+    rows = []
+    for records in _payload_records(payload):
+        for record in records:
+            arn = _lookup(record, ARN_KEYS)
+            pickup = _lookup(record, PICKUP_KEYS)
+            ship_to = _lookup(record, SHIP_TO_KEYS)
+            if not (arn and pickup and ship_to):
+                return []
+
+            asn_id = _lookup(record, ASN_ID_KEYS)
+            pickup_text = f"Pickup: {_format_payload_date(pickup)}"
+            href = f"/kt/vendor/members/afi-shipment-mgr/shipmentdetail?rr={arn}"
+            rows.append({
+                "arn": str(arn),
+                "href": f"{href}&asn={asn_id}" if asn_id else href,
+                "pickup": pickup_text,
+                "sl2": pickup_text,
+                "date": _format_payload_date(pickup),
+                "ship": str(ship_to),  # Bots take the warehouse code before the first ',', a bare FC code included
+            })
+    return rows
+
+class QueueResponseListener:
+    """Collects shipping queue rows from the xhr/fetch responses the table is rendered from."""
+
+    def __init__(self):
+        self.pages = []  # Parsed rows, one entry per payload
+        self.active = True
+        self._changed = asyncio.Event()
+
+    async def on_response(self, response):
+        if response.request.resource_type not in ("xhr", "fetch") or queue_api_hint not in response.url:
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        try:
+            rows = parse_queue_payload(await response.json())
+        except Exception:
+            return
+        if rows:
+            self.pages.append(rows)
+            self._changed.set()
+
+    async def wait_for_page(self, seen, timeout):
+        """Waits until more than `seen` payloads have arrived. Returns False on timeout."""
+        deadline = time.perf_counter() + timeout
+        while len(self.pages) <= seen:
+            self._changed.clear()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+def attach_queue_listener(page):
+    """
+    Starts collecting shipping queue payloads on this page when queue_source is "network".
+    Must be called before the page navigates to the shipping queue.
+    Calling it again on the same page (e.g. a SessionDaemon page) starts a fresh collection.
+    """
+    if queue_source != "network":
+        return
+    if page in queue_listeners:
+        queue_listeners[page].pages = []
+        queue_listeners[page].active = True
+        return
+    listener = QueueResponseListener()
+    page.on("response", listener.on_response)
+    queue_listeners[page] = listener
+    print("📡 Reading the shipping queue from network responses.")
+
+async def extract_rows(page):
+    """
+    Returns every row on the current shipping queue page as a list of dicts:
+    arn, href, pickup ('Pickup:' label), sl2 (first sl2 label), date (date column)
+    and ship (ship from / ship to labels joined with ' | ').
+
+    While a snapshot is being replayed the rows come from the snapshot.
+    With a network listener attached the rows come straight from the last payload.
+    Otherwise this is two round trips per page no matter how many rows there are.
+    """
+    snapshot = queue_snapshots.get(page)
+    if snapshot and snapshot.replaying:
+        return snapshot.pages[snapshot.index]
+
+    rows = await _read_rows(page)
+    if snapshot:
+        snapshot.record(rows)
+    return rows
+
+async def _read_rows(page):
+    listener = queue_listeners.get(page)
+    if listener and listener.active:
+        if listener.pages or await listener.wait_for_page(0, first_payload_timeout):
+            return listener.pages[-1]
+        print("⚠️ No shipping queue payload seen, reading the table instead.")
+        listener.active = False
+
+    await page.wait_for_selector("div.rdt_TableRow", state="attached", timeout=20000)
+    return await page.evaluate(ROWS_JS)
+
+async def next_page(page, next_button, page_waits, timeout=20000):
+    """
+    Clicks 'Next' and waits until the first row's ARN changes (or, with a network listener,
+    until the next payload arrives), then returns right away.
+    The time waited is appended to page_waits.
+
+    While a snapshot is being replayed this just moves to the snapshot's next page. When the
+    run needs a page the snapshot doesn't have, the live table is clicked forward to it.
+
+    Returns False when the table never changed (last page or the page stopped loading).
+    """
+    snapshot = queue_snapshots.get(page)
+    if snapshot and snapshot.replaying:
+        if snapshot.index + 1 < len(snapshot.pages):
+            snapshot.index += 1
+            return True
+        if snapshot.complete:
+            return False
+        next_button = await _catch_up(page, snapshot, page_waits, timeout)
+        if not next_button:
+            return False
+
+    moved = await _click_next(page, next_button, page_waits, timeout)
+    if snapshot:
+        if moved:
+            snapshot.index += 1
+        else:
+            snapshot.complete = True
+    return moved
+
+async def _catch_up(page, snapshot, page_waits, timeout):
+    """
+    Stops replaying and clicks the live table (still on the page the run opened) forward to the snapshot's
+    last page. Returns the 'Next' button to click from there, or None if the table ran out.
+    """
+    print(f"🔄 Snapshot ends at page {len(snapshot.pages)}, catching the live table up...")
+    snapshot.replaying = False
+    for _ in range(snapshot.index):
+        next_button = await page.query_selector("div#sq-pag-next-div")
+        if not next_button or not await _click_next(page, next_button, page_waits, timeout):
+            return None
+    return await page.query_selector("div#sq-pag-next-div")
+
+async def _click_next(page, next_button, page_waits, timeout):
+    first_arn = await page.evaluate(FIRST_ARN_JS)
+    start = time.perf_counter()
+    listener = queue_listeners.get(page)
+    seen = len(listener.pages) if listener else 0
+    await next_button.click()
+
+    if listener and listener.active:
+        deadline = start + timeout / 1000
+        while await listener.wait_for_page(seen, deadline - time.perf_counter()):
+            if listener.pages[-1][0]["arn"] != first_arn:
+                page_waits.append(time.perf_counter() - start)
+                return True
+            seen = len(listener.pages)  # A refresh of the same page, keep waiting
+        # No payload for the next page, so only the table can tell if it changed
+        listener.active = False
+        page_waits.append(time.perf_counter() - start)
+        if await page.evaluate(FIRST_ARN_JS) != first_arn:
+            print("⚠️ No payload for the next page, reading the table instead.")
+            return True
+        print(f"⚠️ Table did not change within {timeout / 1000:.0f}s after clicking 'Next'.")
+        return False
+
+    try:
+        await page.wait_for_function(
+            f"(previous) => ({FIRST_ARN_JS.strip()})() !== previous",
+            arg=first_arn,
+            timeout=timeout,
+        )
+        page_waits.append(time.perf_counter() - start)
+        return True
+    except PlaywrightTimeoutError:
+        page_waits.append(time.perf_counter() - start)
+        print(f"⚠️ Table did not change within {timeout / 1000:.0f}s after clicking 'Next'.")
+        return False
+
+class QueueSnapshot:
+    """Pages of the shipping queue (row lists, in order) walked for one pickup date."""
+
+    def __init__(self, formatted_date, fetched=None, pages=None, complete=False):
+        self.formatted_date = formatted_date
+        self.fetched = fetched or time.time()
+        self.pages = pages or []
+        self.complete = complete  # True when the walk reached the last page of the queue
+        self.index = 0  # Page the bot is on
+        self.replaying = bool(pages)
+        self.changed = False
+
+    def record(self, rows):
+        self.pages[self.index:] = [rows]
+        self.changed = True
+
+def _read_snapshots():
+    try:
+        with open(snapshot_file, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return saved if isinstance(saved, dict) else {}
+
+def _write_snapshots(saved):
+    """Writes to a temp file first so a crash never leaves a half-written snapshot file."""
+    temp_file = f"{snapshot_file}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(temp_file, snapshot_file)
+    except OSError as e:
+        print(f"⚠️ Could not write queue snapshot {snapshot_file}: {e}")
+
+async def start_queue_snapshot(page, formatted_date):
+    """
+    Called with the live queue on page 1, before paginating for formatted_date.
+    Replays the saved snapshot for the date if it is younger than snapshot_ttl and its first
+    page still matches the live table (one read of page 1). Otherwise the pages this run
+    walks are recorded for save_queue_snapshot.
+    """
+    queue_snapshots.pop(page, None)
+    if not use_queue_snapshots:
+        return
+    snapshot = QueueSnapshot(formatted_date)
+    saved = _read_snapshots().get(formatted_date)
+    if saved and time.time() - saved["fetched"] < snapshot_ttl:
+        if await _read_rows(page) == saved["pages"][0]:
+            snapshot = QueueSnapshot(formatted_date, saved["fetched"], saved["pages"], saved["complete"])
+            print(
+                f"♻️ Reusing the {formatted_date} shipping queue snapshot from "
+                f"{(time.time() - saved['fetched']) / 60:.0f} min ago ({len(saved['pages'])} page(s))."
+            )
+        else:
+            print("🔄 First page of the shipping queue changed since the last snapshot, reading it again.")
+    queue_snapshots[page] = snapshot
+
+def save_queue_snapshot(page):
+    """Saves the pages this run read from the live table and drops expired snapshots."""
+    snapshot = queue_snapshots.pop(page, None)
+    if not snapshot or not snapshot.changed:
+        return
+    now = time.time()
+    saved = {date: entry for date, entry in _read_snapshots().items() if now - entry["fetched"] < snapshot_ttl}
+    saved[snapshot.formatted_date] = {
+        "fetched": snapshot.fetched,
+        "complete": snapshot.complete,
+        "pages": snapshot.pages,
+    }
+    _write_snapshots(saved)
+
+def row_pickup_date(row):
+    """The pickup date of a queue row as a datetime, or None if the row has no readable date."""
+    for text in (row.get("pickup"), row.get("sl2"), row.get("date")):
+        match = re.search(r"([A-Z][a-z]{2}) (\d{1,2}), (\d{4})", text or "")
+        if match:
+            try:
+                return datetime.strptime(" ".join(match.groups()), "%b %d %Y")
+            except ValueError:
+                pass
+    return None
+
+def filtered_queue_url(first, last, page_number=None):
+    """queue_url with the pickup window, sort, page size and page parameters that are set."""
+    values = {
+        "pickup_from": first.strftime(queue_param_date_format),
+        "pickup_to": last.strftime(queue_param_date_format),
+        "sort": queue_sort,
+        "page_size": queue_page_size,
+        "page": page_number,
+    }
+    params = {queue_params[key]: value for key, value in values.items() if queue_params.get(key) and value is not None}
+    return f"{queue_url}?{urlencode(params)}" if params else queue_url
+
+async def _load_queue(page, url):
+    """Opens the queue at url and returns its first rows, [] if no row shows up."""
+    attach_queue_listener(page)  # Fresh payloads for this load
+    await page.goto(url)
+    try:
+        await page.wait_for_selector("div.rdt_TableRow", state="attached", timeout=empty_queue_timeout)
+    except PlaywrightTimeoutError:
+        return []
+    return await _read_rows(page)
+
+async def _jump_to_window(page, first, last, rows):
+    """
+    With the queue sorted by pickup date, finds the first page that reaches `first` by probing
+    pages 2, 4, 8... and then bisecting, instead of clicking 'Next' through every earlier page.
+    Returns (page number the queue is left on, other pages loaded to find it, pages never
+    read before it), or None when the queue ignores the page parameter.
+    """
+    def reaches_window(page_rows):
+        dates = [date for date in map(row_pickup_date, page_rows) if date]
+        return not page_rows or (dates and max(dates) >= first)
+
+    loaded = {1: rows}
+    current = [1]
+
+    async def load(number):
+        if number not in loaded:
+            loaded[number] = await _load_queue(page, filtered_queue_url(first, last, number))
+            current[0] = number
+        return loaded[number]
+
+    low, high = 1, 2  # Page `low` ends before the window, page `high` reaches it (or is past the end)
+    while not reaches_window(await load(high)):
+        if loaded[high] == loaded[low]:
+            return None  # Same rows for another page number
+        low, high = high, high * 2
+    if loaded[high] and loaded[high] == loaded[low]:
+        return None
+    while high - low > 1:
+        middle = (low + high) // 2
+        if reaches_window(await load(middle)):
+            high = middle
+        else:
+            low = middle
+
+    target = high if loaded[high] else low  # Past the end of the queue, stay on its last page
+    reads = len(loaded) - 1
+    if current[0] != target:
+        await _load_queue(page, filtered_queue_url(first, last, target))
+        reads += 1
+    skipped = target - 1 - sum(1 for number in loaded if number < target)
+    return target, reads, skipped
+
+async def open_queue(page, dates):
+    """
+    Opens the shipping queue for the pickup dates (MM/DD/YYYY) the bot is after, asking the queue
+    to filter to them, sort by pickup date and show queue_page_size rows per page.
+
+    The first page decides what the queue actually did:
+    - only rows in the window: the filter works and paging stays inside the window
+    - rows sorted by pickup date: the bot jumps to the page the window starts on
+    - anything else (or no rows): the unfiltered queue from page 1, like before
+    """
+    try:
+        window = [datetime.strptime(date.strip(), "%m/%d/%Y") for date in dates]
+    except ValueError:
+        window = []
+    if not use_queue_filters or not window:
+        queue_reads[page] = {"mode": "unfiltered", "reads": 0, "skipped": 0}
+        await _load_queue(page, queue_url)
+        return
+
+    first, last = min(window), max(window)
+    rows = await _load_queue(page, filtered_queue_url(first, last))
+    dates_read = [date for date in map(row_pickup_date, rows) if date]
+    if rows and dates_read and all(first <= date <= last for date in dates_read):
+        queue_reads[page] = {"mode": "filtered", "reads": 0, "skipped": 0}
+        print(f"🔎 The shipping queue filtered itself to {first:%m/%d/%Y} - {last:%m/%d/%Y}.")
+        return
+
+    if dates_read and dates_read == sorted(dates_read) and queue_params.get("page"):
+        if max(dates_read) >= first:
+            queue_reads[page] = {"mode": "sorted", "reads": 0, "skipped": 0}
+            return
+        jump = await _jump_to_window(page, first, last, rows)
+        if jump:
+            target, reads, skipped = jump
+            queue_reads[page] = {"mode": "jumped", "reads": reads, "skipped": skipped}
+            print(f"⏩ Jumped to page {target} of the shipping queue after reading {reads} page(s).")
+            return
+        print("⚠️ The shipping queue ignored the page parameter, paging from the start.")
+        await _load_queue(page, filtered_queue_url(first, last))
+        queue_reads[page] = {"mode": "sorted", "reads": 0, "skipped": 0}
+        return
+
+    if not rows:
+        print("⚠️ The filtered shipping queue showed no rows, opening it unfiltered.")
+        await _load_queue(page, queue_url)
+    queue_reads[page] = {"mode": "unfiltered", "reads": 0, "skipped": 0}
+
+def report_page_waits(page_waits, page=None):
+    """
+    Prints how long pagination waited compared to the old fixed sleep per page, and with the
+    page, how many queue pages were read against how many open_queue skipped.
+    """
+    opened = queue_reads.pop(page, None)
+    if opened:
+        skipped = "the site filtered out the rest" if opened["mode"] == "filtered" else f"skipped {opened['skipped']}"
+        print(
+            f"📑 Read {opened['reads'] + len(page_waits) + 1} shipping queue page(s), {skipped} "
+            f"({opened['mode']})."
+        )
+    if not page_waits:
+        return
+    total = sum(page_waits)
+    fixed = fixed_page_sleep * len(page_waits)
+    print(
+        f"⏱️ Waited {total:.1f}s over {len(page_waits)} page change(s) "
+        f"(avg {total / len(page_waits):.2f}s, max {max(page_waits):.2f}s). "
+        f"Fixed {fixed_page_sleep}s sleeps would have taken {fixed:.0f}s."
+    )
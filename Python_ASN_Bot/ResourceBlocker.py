@@ -0,0 +1,85 @@
+"""
+Opt-in request routing for the tabs the bots drive.
+
+The bots only read and click the page, so images, fonts, media, analytics beacons and
+third-party hosts are aborted before they are downloaded. Routing is set on the browser
+context so every worker tab is covered, and taken off again when the run ends so the
+user's own tabs in the same Chrome load normally.
+"""
+from urllib.parse import urlparse
+
+block_resources = False  # Set to True to turn blocking on for all bots
+
+blocked_types = {"image", "media", "font", "ping"}
+# Hosts (and their subdomains) that are never treated as third-party
+allowed_hosts = ("amazon.com", "media-amazon.com", "ssl-images-amazon.com", "amazontrust.com", "a2z.com")
+# Requests to allowed hosts that are still just tracking
+blocked_url_parts = ("fls-na.amazon.com", "unagi-na.amazon.com", "/uedata", "/csm/")
+# Aborted requests never report a size, so bytes saved are estimated from typical sizes
+typical_bytes = {"image": 25_000, "media": 250_000, "font": 40_000, "ping": 500, "script": 60_000, "stylesheet": 20_000}
+
+blocked_stats = {"requests": 0, "bytes": 0, "by_reason": {}}
+_routed_contexts = set()
+
+
+def is_allowed_host(host):
+    return any(host == allowed or host.endswith(f".{allowed}") for allowed in allowed_hosts)
+
+
+def block_reason(request):
+    """Returns why a request should be aborted, or None to let it through."""
+    if request.resource_type == "document":
+        return None  # Never block a page navigation
+    if request.resource_type in blocked_types:
+        return request.resource_type
+    if any(part in request.url for part in blocked_url_parts):
+        return "tracking"
+    host = urlparse(request.url).hostname or ""
+    if host and not is_allowed_host(host):
+        return "third-party"
+    return None
+
+
+async def _route(route):
+    reason = block_reason(route.request)
+    if not reason:
+        await route.continue_()
+        return
+    blocked_stats["requests"] += 1
+    blocked_stats["bytes"] += typical_bytes.get(route.request.resource_type, 5_000)
+    blocked_stats["by_reason"][reason] = blocked_stats["by_reason"].get(reason, 0) + 1
+    await route.abort("blockedbyclient")
+
+
+async def enable_resource_blocking(context):
+    """Starts blocking on this browser context when block_resources is on and resets the counts."""
+    if not block_resources:
+        return
+    blocked_stats.update(requests=0, bytes=0, by_reason={})
+    if context in _routed_contexts:
+        return
+    await context.route("**/*", _route)
+    _routed_contexts.add(context)
+    print("🚫 Blocking images, fonts, media, trackers and third-party requests.")
+
+
+async def disable_resource_blocking(context):
+    """Takes the routing off this browser context again, call it when the run ends."""
+    if context not in _routed_contexts:
+        return
+    _routed_contexts.discard(context)
+    try:
+        await context.unroute("**/*", _route)
+    except Exception:
+        pass  # Browser already closed or disconnected, nothing left to route
+
+
+def report_blocked():
+    """Prints how many requests (and roughly how many bytes) blocking saved this run."""
+    if not block_resources:
+        return
+    reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(blocked_stats["by_reason"].items()))
+    print(
+        f"🚫 Blocked {blocked_stats['requests']} request(s), "
+        f"≈{blocked_stats['bytes'] / 1_000_000:.1f} MB saved ({reasons or 'none'})"
+    )
@@ -0,0 +1,103 @@
+"""
+Deferred retries for ARNs and invoices that failed on something worth trying again.
+
+A failed item is classified by its error. Timeouts and dropped connections are put back
+with an exponential backoff and run again once the main pass is done, up to max_attempts
+tries in all. Validation problems and missing warehouse / shipment data fail the same way
+every time, so they are logged right away and never retried.
+"""
+import asyncio
+import time
+
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+retry_failures = True  # Set to False to log every failure right away like before
+max_attempts = 3  # Tries per ARN / invoice, the first one included
+backoff_base = 5  # Seconds before the first retry, doubled for every retry after it
+backoff_max = 60
+retryable_errors = {"timeout", "network"}
+
+retry_status = "Retrying"  # Status of a row whose item was put back, not journaled or logged
+
+# Parts of Playwright error messages that mean the page or connection dropped, not the data
+network_error_parts = ("net::ERR_", "Navigation failed", "Target closed", "Target page, context or browser has been closed", "frame was detached")
+
+
+def classify_error(error):
+    """Returns "timeout", "network", "missing warehouse", "validation" or "other"."""
+    if isinstance(error, (PlaywrightTimeoutError, asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(error, PlaywrightError):
+        message = str(error)
+        if "Timeout" in message:
+            return "timeout"
+        if any(part in message for part in network_error_parts):
+            return "network"
+        return "other"
+    if isinstance(error, (TypeError, LookupError)):
+        return "missing warehouse"  # No ship days or shipment_details row for the warehouse
+    if isinstance(error, (ValueError, AssertionError)):
+        return "validation"
+    return "other"
+
+
+class RetryQueue:
+
+    def __init__(self, name):
+        self.name = name
+        self.attempts = {}  # key -> tries so far
+        self.pending = []  # [ready at (monotonic), key, item]
+        self.failed = set()  # Keys whose last failure was final
+        self.gave_up = 0
+        self.not_retried = {}  # error kind -> count
+
+    def schedule(self, key, item, error):
+        """
+        Puts the item back for a later try if its error is retryable and it has tries left.
+        Returns True if it will be retried, False if the failure is final.
+        """
+        kind = classify_error(error)
+        attempt = self.attempts.get(key, 1)
+        if not retry_failures or kind not in retryable_errors:
+            self.not_retried[kind] = self.not_retried.get(kind, 0) + 1
+            self.failed.add(key)
+            return False
+        if attempt >= max_attempts:
+            print(f"⛔ {key}: still failing after {attempt} tries ({kind}), giving up")
+            self.gave_up += 1
+            self.failed.add(key)
+            return False
+
+        delay = min(backoff_base * 2 ** (attempt - 1), backoff_max)
+        self.attempts[key] = attempt + 1
+        self.pending.append([time.monotonic() + delay, key, item])
+        print(f"🔁 {key}: {kind}, try {attempt + 1} of {max_attempts} in {delay}s (after the rest)")
+        return True
+
+    async def due(self):
+        """
+        Waits until the earliest retry is due and returns every due item as {key: item}.
+        Returns {} when nothing is left to retry.
+        """
+        if not self.pending:
+            return {}
+        wait = min(ready for ready, _, _ in self.pending) - time.monotonic()
+        if wait > 0:
+            print(f"⏳ Waiting {wait:.0f}s before retrying {len(self.pending)} {self.name}")
+            await asyncio.sleep(wait)
+        now = time.monotonic()
+        due = {key: item for ready, key, item in self.pending if ready <= now}
+        self.pending = [entry for entry in self.pending if entry[0] > now]
+        return due
+
+    def report(self):
+        """Prints how many items were retried, came through on a retry or were given up on."""
+        retried = set(self.attempts)
+        if not retried and not self.not_retried:
+            return
+        recovered = len(retried - self.failed)
+        not_retried = ", ".join(f"{kind}: {count}" for kind, count in sorted(self.not_retried.items()))
+        print(
+            f"🔁 {self.name}: {len(retried)} retried, {recovered} went through on a retry, "
+            f"{self.gave_up} gave up. Not retried: {not_retried or 'none'}"
+        )
@@ -0,0 +1,66 @@
+"""
+Append-only checkpoint journal for the shipping queue bots.
+
+Each ARN's log rows are written as one JSON line and fsync'd as soon as the ARN is
+finished, so a crash or CTRL+C keeps every result so far. With resume_from_journal on, a
+rerun for the same pickup date skips the ARNs that already went through.
+"""
+import json
+import os
+import time
+
+resume_from_journal = False  # Set to True to skip ARNs the journal already has as done for the same pickup date
+
+# Last log column values that mean an ARN doesn't need to be run again
+done_statuses = {"Submitted", "Complete", "Shadow Button Clicked", "Already Completed", "Printed"}
+
+
+def journal_path(log_file):
+    """./ASN_Status.xlsx -> ./ASN_Status.journal.jsonl"""
+    return f"{os.path.splitext(log_file)[0]}.journal.jsonl"
+
+
+def open_journal(log_file):
+    journal = open(journal_path(log_file), "a+", encoding="utf-8")
+    # A crash mid-write leaves a line without "\n", start the next entry on its own line
+    if journal.tell() > 0:
+        journal.seek(journal.tell() - 1)
+        if journal.read(1) != "\n":
+            journal.write("\n")
+    return journal
+
+
+def record(journal, run_key, arn, rows):
+    """Appends one ARN's log rows and forces them to disk before returning."""
+    entry = {"key": run_key, "arn": arn, "rows": rows, "time": time.time()}
+    journal.write(json.dumps(entry, default=str) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def load_completed(log_file, run_key):
+    """
+    Returns {arn: log rows} for ARNs whose latest journal entry for run_key is done.
+    A half-written last line from a crash is ignored. With resume_from_journal off it returns {}
+    and only says how many done ARNs will be run again.
+    """
+    latest = {}
+    try:
+        with open(journal_path(log_file), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("key") == run_key and entry.get("rows"):
+                    latest[entry["arn"]] = entry["rows"]
+    except FileNotFoundError:
+        return {}
+
+    completed = {arn: rows for arn, rows in latest.items() if rows[-1][-1] in done_statuses}
+    if not resume_from_journal:
+        if completed:
+            print(f"ℹ️ {len(completed)} ARN(s) already done for {run_key} are run again (set resume_from_journal = True in RunJournal.py to skip them)")
+        return {}
+    return completed
+
@@ -0,0 +1,169 @@
+import asyncio
+import importlib
+import json
+import sys
+import time
+import warnings
+
+from ASNBot import connect_browser
+
+daemon_host = "127.0.0.1"
+daemon_port = 9333
+pool_size = 2  # Ready tabs kept open in the logged-in browser context
+bots = ("ASNBot", "PrepareLabels", "PrintLabels", "InvoiceSubmissionBot", "Pipeline")
+dated_bots = ("ASNBot", "PrepareLabels", "PrintLabels", "Pipeline")  # Ask for a date with input() when run without one
+
+# Shared CDP connection, only touched through open_session / close_session
+session = {"playwright": None, "browser": None, "pages": None}
+session_lock = asyncio.Lock()
+job_lock = asyncio.Lock()  # One bot run at a time, the bots keep their per-run state in module globals
+
+
+async def open_session():
+    """Connects to Chrome once and opens the pool of ready pages."""
+    playwright, browser, page = await connect_browser()
+    if not page:
+        return False
+
+    pages = asyncio.Queue()
+    pages.put_nowait(page)
+    for _ in range(pool_size - 1):
+        pages.put_nowait(await page.context.new_page())
+
+    session.update(playwright=playwright, browser=browser, pages=pages)
+    print(f"✅ Session ready with {pool_size} page(s).")
+    return True
+
+
+async def close_session():
+    if session["browser"]:
+        try:
+            await session["browser"].close()
+        except Exception:
+            pass
+    if session["playwright"]:
+        await session["playwright"].stop()
+    session.update(playwright=None, browser=None, pages=None)
+
+
+async def ensure_session():
+    """Reconnects if Chrome was restarted since the last job."""
+    async with session_lock:
+        browser = session["browser"]
+        if browser and browser.is_connected():
+            return True
+        if browser:
+            print("⚠️ Browser connection lost, reconnecting...")
+        await close_session()
+        return await open_session()
+
+
+async def lease_page():
+    """Takes a ready page from the pool, replacing it if the tab was closed."""
+    page = await session["pages"].get()
+    if page.is_closed():
+        page = await session["browser"].contexts[0].new_page()
+    return page
+
+
+async def run_job(request):
+    """Runs one bot with a pooled page and returns the reply sent back to the client."""
+    bot = request.get("bot")
+    if bot not in bots:
+        return {"status": "error", "error": f"Unknown bot '{bot}'. Use one of: {', '.join(bots)}"}
+    date_input = request.get("date") if bot in dated_bots else None  # InvoiceSubmissionBot takes no date
+    if bot in dated_bots and not date_input:
+        # The bot would wait on input() in the daemon window and hold up every client
+        return {"status": "error", "bot": bot, "error": f"{bot} needs a date, e.g. python ./SessionDaemon.py {bot} MM/DD/YYYY"}
+    if not await ensure_session():
+        return {"status": "error", "error": "Could not connect to Chrome"}
+
+    module = importlib.import_module(bot)  # Imported once, later jobs reuse the module
+    if job_lock.locked():
+        print(f"⏳ {bot} {date_input or ''} waiting for the running job to finish")
+    async with job_lock:
+        pages = session["pages"]
+        page = await lease_page()
+        start = time.perf_counter()
+        print(f"\n▶️ {bot} {date_input or ''}")
+        try:
+            if date_input:
+                await module.run_script(page=page, date_input=date_input)
+            else:
+                await module.run_script(page=page)
+            return {"status": "done", "bot": bot, "date": date_input, "seconds": round(time.perf_counter() - start, 1)}
+        except Exception as e:
+            print(f"❌ {bot} failed: {e}")
+            return {"status": "error", "bot": bot, "date": date_input, "error": str(e)}
+        finally:
+            pages.put_nowait(page)
+
+
+async def handle_client(reader, writer):
+    try:
+        request = json.loads(await reader.readline())
+        reply = await run_job(request)
+    except json.JSONDecodeError as e:
+        reply = {"status": "error", "error": f"Bad request: {e}"}
+    writer.write((json.dumps(reply) + "\n").encode())
+    await writer.drain()
+    writer.close()
+
+
+async def serve():
+    """Keeps one CDP connection and a pool of pages open and runs bots sent by clients."""
+    warnings.filterwarnings("ignore", category=ResourceWarning)
+    if not await ensure_session():
+        print("❌ No valid page found. Exiting.")
+        return
+
+    server = await asyncio.start_server(handle_client, daemon_host, daemon_port)
+    print(f"✅ Session daemon listening on {daemon_host}:{daemon_port}. Press CTRL+C to stop.")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await close_session()
+        print("✅ Playwright closed successfully.")
+
+
+async def send_job(bot, date_input=None):
+    """Asks the running daemon to run a bot and waits for it to finish."""
+    reader, writer = await asyncio.open_connection(daemon_host, daemon_port)
+    request = {"bot": bot}
+    if date_input:
+        request["date"] = date_input
+    writer.write((json.dumps(request) + "\n").encode())
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    writer.close()
+    return reply
+
+
+async def run_client(bot, dates):
+    """Runs a bot once per date back to back (once with no date for InvoiceSubmissionBot)."""
+    if bot not in dated_bots:
+        dates = None  # Run once, InvoiceSubmissionBot takes no date
+    for date_input in dates or [None]:
+        try:
+            reply = await send_job(bot, date_input)
+        except ConnectionRefusedError:
+            print(f"❌ No session daemon on {daemon_host}:{daemon_port}. Start it with: python ./SessionDaemon.py serve")
+            return
+        if reply["status"] == "done":
+            print(f"✅ {bot} {date_input or ''} finished in {reply['seconds']}s")
+        else:
+            print(f"❌ {bot} {date_input or ''}: {reply['error']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python ./SessionDaemon.py serve")
+        print("       python ./SessionDaemon.py <ASNBot|PrepareLabels|PrintLabels|InvoiceSubmissionBot|Pipeline> [MM/DD/YYYY ...]")
+    elif sys.argv[1] == "serve":
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            print("\n🛑 Session daemon stopped.")
+    else:
+        asyncio.run(run_client(sys.argv[1], sys.argv[2:]))
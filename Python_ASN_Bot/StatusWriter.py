@@ -0,0 +1,70 @@
+"""
+Incremental status log shared by all four bots.
+
+Rows are streamed to <log>.partial.csv on a background thread as soon as they are
+produced, so progress is visible during a run and survives a crash. The Excel log is
+built from the streamed rows at the end, also off the event loop.
+"""
+import asyncio
+import csv
+import os
+import queue
+import threading
+
+import pandas as pd
+
+
+class StatusWriter:
+
+    def __init__(self, log_file, columns):
+        self.log_file = log_file
+        self.columns = columns
+        self.csv_file = f"{os.path.splitext(log_file)[0]}.partial.csv"
+        self.rows = []
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._stream, daemon=True)
+        self._thread.start()
+
+    def _stream(self):
+        with open(self.csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            f.flush()
+            while True:
+                row = self._pending.get()
+                if row is None:
+                    break
+                writer.writerow(row)
+                f.flush()
+
+    def write(self, row):
+        """Queues a row for the partial CSV without blocking the event loop."""
+        row = list(row)
+        self.rows.append(row)
+        self._pending.put(row)
+
+    def stop(self):
+        """Stops the streaming thread. Safe to call more than once."""
+        if self._thread.is_alive():
+            self._pending.put(None)
+            self._thread.join()
+
+    def _save_excel(self, rows):
+        pd.DataFrame(rows, columns=self.columns).to_excel(self.log_file, index=False, engine="openpyxl")
+        try:
+            os.remove(self.csv_file)  # The Excel log has everything now
+        except OSError as e:
+            print(f"⚠️ Could not remove {self.csv_file} ({e}), the Excel log was saved anyway")
+
+    async def close(self, order=None):
+        """
+        Writes the Excel log from the streamed rows. With `order` (ARNs / POs) the rows are
+        grouped in that order; rows for the same key keep the order they were written in.
+        """
+        await asyncio.to_thread(self.stop)
+        rows = self.rows
+        if order is not None:
+            rank = {key: i for i, key in enumerate(order)}
+            rows = sorted(rows, key=lambda row: rank.get(row[0], len(rank)))
+        await asyncio.to_thread(self._save_excel, rows)
+        print(f"✅ Log saved to {self.log_file}")
@@ -0,0 +1,140 @@
+"""
+Opt-in per-step tracing for the bots.
+
+Every bot step (@traced functions), page call (goto, wait_for_selector, evaluate, clicks...)
+and fixed sleep becomes a timed span tagged with the ARN / PO being worked on. At the end
+of a run the spans are written as a Chrome trace-event file (open it at chrome://tracing
+or https://ui.perfetto.dev) and a table of total / p50 / p95 time per step is printed.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import time
+
+tracing = False  # Set to True to trace every run
+trace_folder = "."  # <bot>_trace.json is written here
+
+# Page methods timed once a page is instrumented
+traced_page_methods = (
+    "goto", "wait_for_selector", "wait_for_function", "evaluate", "evaluate_handle",
+    "click", "dblclick", "fill", "query_selector", "query_selector_all", "screenshot",
+)
+
+current_tag = contextvars.ContextVar("current_tag", default=None)  # ARN / PO of the running task
+spans = []
+_lanes = {}  # asyncio task -> lane number in the trace
+_start = time.perf_counter()
+
+
+def set_tag(key):
+    """Tags every span from here on in the current task (each tab's worker task has its own)."""
+    current_tag.set(key)
+
+
+def _lane():
+    return _lanes.setdefault(asyncio.current_task(), len(_lanes) + 1)
+
+
+def add_span(name, category, start, end):
+    spans.append({
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": round((start - _start) * 1e6),
+        "dur": round((end - start) * 1e6),
+        "pid": os.getpid(),
+        "tid": _lane(),
+        "args": {"tag": current_tag.get()},
+    })
+
+
+def traced(func):
+    """Times an async bot step as one span while tracing is on."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not tracing:
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            add_span(func.__name__, "step", start, time.perf_counter())
+    return wrapper
+
+
+async def traced_sleep(seconds):
+    """asyncio.sleep that shows up in the trace, so fixed waits can be told apart from page time."""
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    if tracing:
+        add_span(f"sleep {seconds}s", "sleep", start, time.perf_counter())
+
+
+def instrument_page(page):
+    """Replaces the page's traced_page_methods with timed versions. Safe to call more than once."""
+    if not tracing or getattr(page, "_traced", False):
+        return page
+    for name in traced_page_methods:
+        method = getattr(page, name)
+
+        async def timed(*args, _method=method, _name=f"page.{name}", **kwargs):
+            start = time.perf_counter()
+            try:
+                return await _method(*args, **kwargs)
+            finally:
+                add_span(_name, "page", start, time.perf_counter())
+
+        setattr(page, name, timed)
+    page._traced = True
+    return page
+
+
+def instrument_context(context):
+    """Instruments every open page of the context and every tab opened later (worker tabs)."""
+    if not tracing:
+        return
+    for page in context.pages:
+        instrument_page(page)
+    if not getattr(context, "_traced", False):
+        context.on("page", instrument_page)
+        context._traced = True
+
+
+def start_trace():
+    """Drops the spans of a previous run (SessionDaemon keeps the module loaded between runs)."""
+    global _start
+    spans.clear()
+    _lanes.clear()
+    _start = time.perf_counter()
+
+
+def percentile(times, q):
+    times = sorted(times)
+    return times[int(q * (len(times) - 1))]
+
+
+def finish_trace(bot):
+    """Writes <bot>_trace.json and prints total and percentile time per step."""
+    if not tracing or not spans:
+        return
+    trace_file = os.path.join(trace_folder, f"{bot}_trace.json")
+    lanes = [
+        {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": lane, "args": {"name": f"task {lane}"}}
+        for lane in sorted(_lanes.values())
+    ]
+    with open(trace_file, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": lanes + spans, "displayTimeUnit": "ms"}, f, default=str)
+
+    by_name = {}
+    for span in spans:
+        by_name.setdefault((span["cat"], span["name"]), []).append(span["dur"] / 1e6)
+
+    print(f"\n🔬 {len(spans)} span(s) written to {trace_file}")
+    print(f"{'Step':<34}{'Count':>7}{'Total (s)':>11}{'p50':>8}{'p95':>8}{'Max':>8}")
+    for (_, name), times in sorted(by_name.items(), key=lambda item: -sum(item[1])):
+        print(
+            f"{name:<34}{len(times):>7}{sum(times):>11.2f}"
+            f"{percentile(times, 0.50):>8.2f}{percentile(times, 0.95):>8.2f}{max(times):>8.2f}"
+        )